@@ -1,24 +1,82 @@
 import os
+import json
 import shutil
 import subprocess
 import platform
 import sys
+from pathlib import Path
 
-# Check if Graphviz is installed and in PATH
-def check_dot_in_path():
+# Probe results per 'dot' binary, reused until the binary changes (see probe_graphviz).
+CAPABILITIES_CACHE = Path.home() / ".cache" / "python-imports-graphviz" / "capabilities.json"
+
+def _run_dot(dot_path, flag):
+    # dot reports -V and the -T?/-K? lists on stderr; -T? and -K? exit non-zero.
+    result = subprocess.run([dot_path, flag], capture_output=True, text=True, check=flag == "-V")
+    return (result.stderr or result.stdout).strip()
+
+def _listed(message):
+    # 'Format: "?" not recognized. Use one of: bmp canon ... png:cairo png:gd svg ...'
+    _, _, names = message.partition("Use one of:")
+    return sorted({name.split(':')[0] for name in names.split()})
+
+def probe_graphviz(refresh=False, cache_path=CAPABILITIES_CACHE):
+    """
+    Returns what the 'dot' on PATH can do, as {"path", "stamp", "version", "engines",
+    "formats"}, or None when there is no 'dot'. The result is cached in cache_path per
+    binary and reused while the binary's mtime and size are unchanged, so a warm
+    check runs no subprocess. Raises subprocess.CalledProcessError when 'dot' fails.
+    """
     dot_path = shutil.which("dot")
-    if dot_path:
-        print(f"[✔] Found 'dot' executable at: {dot_path}")
-        try:
-            version = subprocess.check_output(["dot", "-V"], stderr=subprocess.STDOUT).decode()
-            print(f"[✔] Graphviz version: {version.strip()}")
-        except subprocess.CalledProcessError as e:
-            print(f"[!] 'dot' found but failed to execute: {e.output.decode().strip()}")
-            return False
-        return True
-    else:
+    if dot_path is None:
+        return None
+    dot_path = os.path.realpath(dot_path)
+    stat = os.stat(dot_path)
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    entry = cached.get(dot_path)
+    if not refresh and entry and entry.get("stamp") == stamp:
+        return entry
+
+    entry = {
+        "path": dot_path,
+        "stamp": stamp,
+        "version": _run_dot(dot_path, "-V"),
+        "engines": _listed(_run_dot(dot_path, "-K?")),
+        "formats": _listed(_run_dot(dot_path, "-T?")),
+    }
+    cached[dot_path] = entry
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cached, f, indent=2)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        print(f"[!] Could not cache the Graphviz probe in {cache_path}: {e}")
+    return entry
+
+# Check if Graphviz is installed and in PATH
+def check_dot_in_path(refresh=False):
+    try:
+        capabilities = probe_graphviz(refresh)
+    except subprocess.CalledProcessError as e:
+        print(f"[!] 'dot' found but failed to execute: {(e.stderr or e.stdout or '').strip()}")
+        return False
+    except OSError as e:
+        print(f"[!] 'dot' found but failed to execute: {e}")
+        return False
+    if capabilities is None:
         print("[✘] 'dot' not found in PATH.")
         return False
+    print(f"[✔] Found 'dot' executable at: {capabilities['path']}")
+    print(f"[✔] Graphviz version: {capabilities['version']}")
+    print(f"[INFO] Layout engines: {' '.join(capabilities['engines'])}")
+    print(f"[INFO] Output formats: {' '.join(capabilities['formats'])}")
+    return True
 
 def suggest_fix():
     system = platform.system()
@@ -37,8 +95,14 @@ def suggest_fix():
         print(f"[!] Unsupported platform: {system}")
 
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the Graphviz installation used by the diagram scripts.")
+    parser.add_argument("--refresh", action="store_true",
+                        help=f"Probe 'dot' again instead of reusing {CAPABILITIES_CACHE}")
+    args = parser.parse_args()
+
     print("[INFO] Checking Graphviz system installation...\n")
-    if not check_dot_in_path():
+    if not check_dot_in_path(args.refresh):
         suggest_fix()
 
 if __name__ == "__main__":
@@ -1,166 +1,2081 @@
 import os
 import re
+import io
 import json
 import csv
 import sys
-import subprocess
+import mmap
+import time
+import fnmatch
+import hashlib
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
-# Ensure required package is installed
-try:
-    from stdlib_list import stdlib_list
-except ImportError:
-    print("[INFO] 'stdlib_list' not found. Installing...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "stdlib_list"])
-    from stdlib_list import stdlib_list  # Import after installation
+# Top-level standard-library modules for Pythons older than 3.10, which lack
+# sys.stdlib_module_names. Kept offline so startup never needs pip or the network.
+BUNDLED_STDLIB_MODULES = """
+    __future__ _thread abc aifc antigravity argparse array ast asynchat asyncio asyncore
+    atexit audioop base64 bdb binascii binhex bisect builtins bz2 cProfile calendar cgi
+    cgitb chunk cmath cmd code codecs codeop collections colorsys compileall concurrent
+    configparser contextlib contextvars copy copyreg crypt csv ctypes curses dataclasses
+    datetime dbm decimal difflib dis distutils doctest dummy_threading email encodings
+    ensurepip enum errno faulthandler fcntl filecmp fileinput fnmatch formatter fractions
+    ftplib functools gc genericpath getopt getpass gettext glob graphlib grp gzip hashlib
+    heapq hmac html http idlelib imaplib imghdr imp importlib inspect io ipaddress itertools
+    json keyword lib2to3 linecache locale logging lzma macpath mailbox mailcap marshal math
+    mimetypes mmap modulefinder msilib msvcrt multiprocessing netrc nis nntplib nt ntpath
+    nturl2path numbers opcode operator optparse os ossaudiodev parser pathlib pdb pickle
+    pickletools pipes pkgutil platform plistlib poplib posix posixpath pprint profile pstats
+    pty pwd py_compile pyclbr pydoc pydoc_data pyexpat queue quopri random re readline
+    reprlib resource rlcompleter runpy sched secrets select selectors shelve shlex shutil
+    signal site smtpd smtplib sndhdr socket socketserver spwd sqlite3 sre_compile
+    sre_constants sre_parse ssl stat statistics string stringprep struct subprocess sunau
+    symbol symtable sys sysconfig syslog tabnanny tarfile telnetlib tempfile termios
+    textwrap this threading time timeit tkinter token tokenize trace traceback
+    tracemalloc tty turtle turtledemo types typing unicodedata unittest urllib uu uuid venv
+    warnings wave weakref webbrowser winreg winsound wsgiref xdrlib xml xmlrpc zipapp
+    zipfile zipimport zlib zoneinfo
+"""
 
-# Determine current Python major.minor version for standard lib detection
-PY_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
-STD_LIBS = set(stdlib_list(PY_VERSION))
+@lru_cache(maxsize=None)
+def std_libs():
+    """
+    Returns the set of top-level standard-library module names, built on first use.
+    """
+    names = getattr(sys, "stdlib_module_names", None)
+    if names is not None:
+        return frozenset(names)
+    return frozenset(BUNDLED_STDLIB_MODULES.split()) | frozenset(sys.builtin_module_names)
+
+def normalize_distribution_name(name):
+    # PEP 503 normalisation, so 'Scikit_Learn' and 'scikit-learn' compare equal.
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def installed_distributions():
+    """
+    Returns {top-level import name: [(distribution, version), ...]} for the running interpreter.
+    """
+    from importlib import metadata
+
+    versions = {}
+    for dist in metadata.distributions():
+        dist_name = dist.metadata['Name']
+        if dist_name:
+            versions.setdefault(dist_name, dist.version)
+
+    if hasattr(metadata, 'packages_distributions'):
+        top_level = metadata.packages_distributions()
+    else:
+        # Python < 3.10: same derivation packages_distributions() uses.
+        top_level = {}
+        for dist in metadata.distributions():
+            names = (dist.read_text('top_level.txt') or '').split()
+            if not names:
+                names = {f.parts[0].split('.')[0] for f in (dist.files or ())
+                         if f.suffix == '.py' or f.name == '__init__.py'}
+            for name in names:
+                top_level.setdefault(name, []).append(dist.metadata['Name'])
+
+    return {name: [(dist, versions.get(dist, '')) for dist in dict.fromkeys(dists)]
+            for name, dists in top_level.items()}
+
+def contains_python_file(directory):
+    # Stops at the first .py file, so a large directory is not listed in full; an
+    # unreadable directory counts as empty.
+    try:
+        with os.scandir(directory) as entries:
+            return any(entry.name.endswith('.py') for entry in entries)
+    except OSError:
+        return False
+
+def local_top_level_names(root_dir):
+    """
+    Returns the top-level packages and modules a scanned tree provides itself: the
+    packages and .py modules at its root and, for src layouts, under src/.
+    """
+    names = set()
+    if root_dir is None:
+        return names
+    for base in (Path(root_dir), Path(root_dir) / 'src'):
+        try:
+            entries = list(os.scandir(base))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir() and entry.name.isidentifier():
+                if contains_python_file(entry.path):
+                    names.add(entry.name)
+            elif entry.name.endswith('.py') and entry.name[:-3].isidentifier():
+                names.add(entry.name[:-3])
+    return names
+
+class ModuleClassifier:
+    """
+    Classifies top-level module names as 'standard', 'third-party', 'local' or
+    'unknown'. The stdlib table, the installed-distribution index and the scanned
+    root's own top-level names are built once; every name is then classified once
+    and memoised, so classifying millions of records costs dictionary lookups.
+    The distribution index is only built when a name is neither stdlib nor local.
+    """
+
+    def __init__(self, root_dir=None):
+        self.std_libs = std_libs()
+        self.local_names = local_top_level_names(root_dir)
+        self.distributions = None
+        self.distribution_names = None
+        self.memo = {}
+
+    def _load_distributions(self):
+        self.distributions = installed_distributions()
+        self.distribution_names = {normalize_distribution_name(dist): (dist, version)
+                                   for dists in self.distributions.values() for dist, version in dists}
+
+    def describe(self, package):
+        """
+        Returns (label, distribution) for a package as recorded by the extractor, i.e. a
+        top-level module name or a 'name==version' pin. distribution is 'name==version'
+        of the installed distribution providing it, or '' when there is none.
+        """
+        result = self.memo.get(package)
+        if result is None:
+            result = self.memo[package] = self._describe(package)
+        return result
+
+    def classify(self, package):
+        return self.describe(package)[0]
+
+    def _describe(self, package):
+        name = package.split('==')[0]
+        if name.startswith('.'):
+            return "local", ''
+        if name in self.std_libs:
+            return "standard", ''
+        if name in self.local_names:
+            return "local", ''
+        if self.distributions is None:
+            self._load_distributions()
+        dists = self.distributions.get(name)
+        if dists:
+            return "third-party", ', '.join(f"{dist}=={version}" for dist, version in dists)
+        # Pins from requirements and pip magics name distributions, not modules.
+        dist = self.distribution_names.get(normalize_distribution_name(name))
+        if dist:
+            return "third-party", f"{dist[0]}=={dist[1]}"
+        return "unknown", ''
+
+@lru_cache(maxsize=None)
+def _default_classifier():
+    return ModuleClassifier()
 
 def classify_module(name):
-    if name in STD_LIBS:
-        return "standard"
-    return "custom"
+    return _default_classifier().classify(name)
+
+IMPORT_FROM_RE = re.compile(r'^\s*from\s+([a-zA-Z0-9_\.]+)\s+import\s+([a-zA-Z0-9_\*,\s]+)')
+IMPORT_PLAIN_RE = re.compile(r'^\s*import\s+([a-zA-Z0-9_\.]+)(\s+as\s+([a-zA-Z0-9_]+))?')
+VERSION_PIN_RE = re.compile(r'([a-zA-Z0-9_\-]+)==([\d\.]+)')
+
+# Whole-buffer equivalents of the line regexes above for the mmap engine. Group 0
+# spans the full physical line, which is what gets reported as the import statement.
+IMPORT_LINE_BYTES_RE = re.compile(
+    rb'^[ \t\f]*(?:from[ \t\f]+([a-zA-Z0-9_.]+)[ \t\f]+import[ \t\f]+([a-zA-Z0-9_*, \t\f]+)'
+    rb'|import[ \t\f]+([a-zA-Z0-9_.]+)(?:[ \t\f]+as[ \t\f]+([a-zA-Z0-9_]+))?)[^\r\n]*',
+    re.MULTILINE,
+)
+VERSION_DIGITS_BYTES_RE = re.compile(rb'[0-9.]+')
+PIN_NAME_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-')
+
+# Extraction engines selectable with --engine; see extract_from_source.
+ENGINES = ('regex', 'ast', 'mmap')
+
+def top_level_module(module):
+    """
+    Returns the top-level package of a dotted module name, keeping the leading
+    dots of a relative import ('.utils.helper' -> '.utils', '..' -> '..').
+    """
+    stripped = module.lstrip('.')
+    return module[:len(module) - len(stripped)] + stripped.split('.')[0]
 
 def extract_packages_and_imports_from_line(line):
     packages = set()
     imports = set()
+    imported_names = set()
 
-    import_from_match = re.match(r'^\s*from\s+([a-zA-Z0-9_\.]+)\s+import\s+([a-zA-Z0-9_\*,\s]+)', line)
-    import_plain_match = re.match(r'^\s*import\s+([a-zA-Z0-9_\.]+)(\s+as\s+([a-zA-Z0-9_]+))?', line)
+    import_from_match = IMPORT_FROM_RE.match(line)
+    import_plain_match = IMPORT_PLAIN_RE.match(line)
 
     if import_from_match:
-        module = import_from_match.group(1).split('.')[0]
+        module = top_level_module(import_from_match.group(1))
         imports.add(line.strip())
         packages.add(module)
+        for name in import_from_match.group(2).split(','):
+            name = ' '.join(name.split())
+            if name:
+                imported_names.add(f"{module}.{name}")
     elif import_plain_match:
-        module = import_plain_match.group(1).split('.')[0]
+        module = top_level_module(import_plain_match.group(1))
         alias = import_plain_match.group(3)
         imports.add(line.strip())
         packages.add(module)
+        imported_names.add(f"{module} as {alias}" if alias else module)
 
-    version_match = re.findall(r'([a-zA-Z0-9_\-]+)==([\d\.]+)', line)
+    version_match = VERSION_PIN_RE.findall(line)
     for name, version in version_match:
         packages.add(f"{name}=={version}")
 
-    return packages, imports
+    return packages, imports, imported_names
+
+def extract_from_text_regex(text):
+    """
+    Line-by-line regex engine: returns (packages, imports, imported_names) for Python source text.
+    """
+    packages, imports, imported_names = set(), set(), set()
+    # StringIO with newline=None splits lines exactly like a file opened in text mode.
+    for line in io.StringIO(text, newline=None):
+        pkgs, imps, names = extract_packages_and_imports_from_line(line)
+        packages.update(pkgs)
+        imports.update(imps)
+        imported_names.update(names)
+    return packages, imports, imported_names
 
-def extract_from_file(file_path, filetype='py'):
-    packages, imports = set(), set()
+def extract_from_text_ast(text):
+    """
+    AST engine: returns the same records as extract_from_text_regex, but also sees
+    parenthesised and backslash-continued imports and every module of 'import a, b'.
+    Falls back to the regex engine for source that does not parse.
+    """
+    import ast
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f if filetype == 'py' else json.load(f).get("cells", [])
-            for line in lines:
-                if filetype == 'ipynb':
-                    if isinstance(line, dict) and line.get("cell_type") == "code":
-                        source_lines = line.get("source", [])
-                        for subline in source_lines:
-                            pkgs, imps = extract_packages_and_imports_from_line(subline)
-                            packages.update(pkgs)
-                            imports.update(imps)
-                else:
-                    pkgs, imps = extract_packages_and_imports_from_line(line)
-                    packages.update(pkgs)
-                    imports.update(imps)
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return extract_from_text_regex(text)
+
+    packages, imports, imported_names = set(), set(), set()
+    lines = None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                module = top_level_module(alias.name)
+                packages.add(module)
+                imported_names.add(f"{module} as {alias.asname}" if alias.asname else module)
+        elif isinstance(node, ast.ImportFrom):
+            module = top_level_module('.' * node.level + (node.module or ''))
+            packages.add(module)
+            for alias in node.names:
+                name = f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+                imported_names.add(f"{module}.{name}")
+        else:
+            continue
+
+        if lines is None:
+            lines = io.StringIO(text, newline=None).readlines()
+        # Report the physical line like the regex engine does; join continuation lines.
+        if node.lineno == node.end_lineno:
+            imports.add(lines[node.lineno - 1].strip())
+        else:
+            imports.add(' '.join(' '.join(lines[node.lineno - 1:node.end_lineno]).split()))
+
+    for name, version in VERSION_PIN_RE.findall(text):
+        packages.add(f"{name}=={version}")
+
+    return packages, imports, imported_names
+
+def extract_from_buffer(buf):
+    """
+    mmap engine: runs one multiline bytes regex over a whole buffer (bytes or mmap)
+    and decodes only the matched spans. Returns the same records as the regex engine.
+    """
+    packages, imports, imported_names = set(), set(), set()
+
+    for match in IMPORT_LINE_BYTES_RE.finditer(buf):
+        from_module, from_names, plain_module, alias = match.groups()
+        imports.add(match.group(0).decode('utf-8', 'replace').strip())
+        if from_module is not None:
+            module = top_level_module(from_module.decode('ascii'))
+            packages.add(module)
+            for name in from_names.decode('ascii').split(','):
+                name = ' '.join(name.split())
+                if name:
+                    imported_names.add(f"{module}.{name}")
+        else:
+            module = top_level_module(plain_module.decode('ascii'))
+            packages.add(module)
+            imported_names.add(f"{module} as {alias.decode('ascii')}" if alias else module)
+
+    for name, version in find_version_pins(buf):
+        packages.add(f"{name.decode('ascii')}=={version.decode('ascii')}")
+
+    return packages, imports, imported_names
+
+def find_version_pins(buf):
+    """
+    Returns the same (name, version) pairs as VERSION_PIN_RE.findall, for a bytes buffer.
+
+    The regex restarts at every identifier character, which makes it the slowest part
+    of a scan. Jumping between '==' with find() and walking back over the name is
+    equivalent and an order of magnitude faster.
+    """
+    pins = []
+    pos = 0
+    while True:
+        i = buf.find(b'==', pos)
+        if i < 0:
+            return pins
+        start = i
+        while start > pos and buf[start - 1] in PIN_NAME_BYTES:
+            start -= 1
+        version = VERSION_DIGITS_BYTES_RE.match(buf, i + 2) if start < i else None
+        if version is None:
+            pos = i + 1
+            continue
+        pins.append((buf[start:i], version.group(0)))
+        pos = version.end()
+
+_TEXT_ENGINES = {
+    'regex': extract_from_text_regex,
+    'ast': extract_from_text_ast,
+}
+
+class NotebookReader:
+    """
+    Minimal streaming JSON reader over a notebook buffer (bytes or mmap).
+
+    Only the values that are asked for are decoded; everything else, notably the
+    base64 images and dataframes in cell outputs, is skipped by scanning for the
+    closing quote or bracket in C, without ever becoming a Python object.
+    """
+
+    WS_RE = re.compile(rb'[ \t\r\n]*')
+    STRUCTURE_RE = re.compile(rb'[\[\]{}"]')
+    SCALAR_RE = re.compile(rb'[^,\]}\s]+')
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def peek(self):
+        self.pos = self.WS_RE.match(self.buf, self.pos).end()
+        return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char.decode()!r} at offset {self.pos} of notebook JSON")
+        self.pos += 1
+
+    def skip_string(self):
+        # find() is a memchr over the buffer, several times faster than a regex on
+        # multi-MB base64 outputs. A quote preceded by an odd run of backslashes is escaped.
+        buf = self.buf
+        start = self.pos + 1
+        while True:
+            end = buf.find(b'"', start)
+            if end < 0:
+                raise ValueError(f"Unterminated string at offset {self.pos} of notebook JSON")
+            backslash = end
+            while buf[backslash - 1] == 0x5C:
+                backslash -= 1
+            if (end - backslash) % 2 == 0:
+                self.pos = end + 1
+                return
+            start = end + 1
+
+    def skip(self):
+        char = self.peek()
+        if char == b'"':
+            self.skip_string()
+        elif char in (b'{', b'['):
+            depth = 0
+            while True:
+                match = self.STRUCTURE_RE.search(self.buf, self.pos)
+                if match is None:
+                    raise ValueError("Unterminated object in notebook JSON")
+                self.pos = match.start()
+                char = self.buf[self.pos:self.pos + 1]
+                if char == b'"':
+                    self.skip_string()
+                    continue
+                self.pos += 1
+                depth += 1 if char in (b'{', b'[') else -1
+                if depth == 0:
+                    return
+        else:
+            match = self.SCALAR_RE.match(self.buf, self.pos)
+            if match is None:
+                raise ValueError(f"Expected a value at offset {self.pos} of notebook JSON")
+            self.pos = match.end()
+
+    def value(self):
+        self.peek()
+        start = self.pos
+        self.skip()
+        return json.loads(self.buf[start:self.pos])
+
+    def members(self):
+        """
+        Yields the keys of the object at the current position. The caller reads the
+        value with value(); values it does not read are skipped.
+        """
+        self.expect(b'{')
+        if self.peek() == b'}':
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != b'"':
+                raise ValueError(f"Expected a key at offset {self.pos} of notebook JSON")
+            key = self.value()
+            self.expect(b':')
+            start = self.pos
+            yield key
+            if self.pos == start:
+                self.skip()
+            if self.peek() == b',':
+                self.pos += 1
+            else:
+                self.expect(b'}')
+                return
+
+    def elements(self):
+        """
+        Yields once per element of the array at the current position, with the same
+        read-or-skip contract as members().
+        """
+        self.expect(b'[')
+        if self.peek() == b']':
+            self.pos += 1
+            return
+        while True:
+            start = self.pos
+            yield
+            if self.pos == start:
+                self.skip()
+            if self.peek() == b',':
+                self.pos += 1
+            else:
+                self.expect(b']')
+                return
+
+    def code_sources(self):
+        for key in self.members():
+            if key != "cells" or self.peek() != b'[':
+                continue
+            for _ in self.elements():
+                if self.peek() != b'{':
+                    continue
+                cell_type = source = None
+                for cell_key in self.members():
+                    if cell_key == "cell_type":
+                        cell_type = self.value()
+                    elif cell_key == "source":
+                        source = self.value()
+                if cell_type == "code" and source is not None:
+                    yield source if isinstance(source, str) else ''.join(source)
+
+def iter_notebook_sources(buf):
+    """
+    Yields the source of every code cell of a notebook as one string per cell,
+    streaming the 'cells' array without materialising outputs or metadata.
+    """
+    return NotebookReader(buf).code_sources()
+
+MAGIC_LINE_RE = re.compile(r'^[ \t]*[%!].*$', re.MULTILINE)
+PIP_MAGIC_RE = re.compile(r'^[ \t]*[%!][ \t]*(?:python[\d.]*[ \t]+-m[ \t]+)?pip3?[ \t]+install[ \t]+(.*)$', re.MULTILINE)
+# pip options whose value is the next token, not a requirement.
+PIP_OPTIONS_WITH_VALUE = {
+    '-r', '--requirement', '-c', '--constraint', '-e', '--editable', '-i', '--index-url',
+    '--extra-index-url', '-f', '--find-links', '-t', '--target', '--prefix', '--root',
+}
+REQUIREMENT_NAME_RE = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._\-]*)(?:\[[^\]]*\])?(==[\d.]+$)?')
+
+def extract_pip_magics(source):
+    """
+    Returns the packages installed by %pip / !pip install lines of a notebook cell,
+    as 'name==version' for pinned requirements and 'name' otherwise.
+    """
+    packages = set()
+    for match in PIP_MAGIC_RE.finditer(source):
+        tokens = match.group(1).split('#')[0].split()
+        skip_next = False
+        for token in tokens:
+            token = token.strip('\'"')
+            if skip_next:
+                skip_next = False
+            elif token in (';', '&&', '||', '|'):
+                break
+            elif token.startswith('-'):
+                skip_next = token in PIP_OPTIONS_WITH_VALUE
+            elif '/' not in token and '$' not in token and '{' not in token:
+                requirement = REQUIREMENT_NAME_RE.match(token)
+                if requirement:
+                    packages.add(requirement.group(1) + (requirement.group(2) or ''))
+    return packages
+
+def split_notebook_magics(source):
+    """
+    Returns (python_source, pip_packages) for a code cell. IPython magic and shell
+    lines are blanked out so the cell parses as Python; cell magics such as %%bash
+    make the whole cell non-Python.
+    """
+    pip_packages = extract_pip_magics(source) if '!' in source or '%' in source else set()
+    if source.lstrip().startswith('%%'):
+        return '', pip_packages
+    return MAGIC_LINE_RE.sub('', source), pip_packages
+
+def extract_from_source(data, filetype='py', file_path=None, engine='regex'):
+    """
+    Extracts packages, import statements and imported names from the raw bytes of
+    a .py or .ipynb file using one of the ENGINES.
+    """
+    packages, imports, imported_names = set(), set(), set()
+
+    try:
+        if filetype == 'py':
+            if engine == 'mmap':
+                return extract_from_buffer(data)
+            # Cheap byte-level pre-filter: without these markers no engine can find anything.
+            if engine == 'ast' and b'import' not in data and b'==' not in data:
+                return packages, imports, imported_names
+            return _TEXT_ENGINES[engine](data.decode('utf-8'))
+
+        for source in iter_notebook_sources(data):
+            code, pip_packages = split_notebook_magics(source)
+            packages.update(pip_packages)
+            if engine == 'mmap':
+                pkgs, imps, names = extract_from_buffer(code.encode('utf-8'))
+            else:
+                pkgs, imps, names = _TEXT_ENGINES[engine](code)
+            packages.update(pkgs)
+            imports.update(imps)
+            imported_names.update(names)
     except Exception as e:
         print(f"[!] Error reading {file_path}: {e}")
 
-    return packages, imports
+    return packages, imports, imported_names
 
-def write_summary_files(summary_data, root_dir):
-    summary_txt = Path(root_dir) / "summary_all_packages.txt"
-    summary_csv = Path(root_dir) / "summary_all_packages.csv"
-    summary_md = Path(root_dir) / "summary_all_packages.md"
+@contextmanager
+def open_source(file_path, use_mmap=False):
+    """
+    Yields the content of a file as bytes, or as a read-only mmap when use_mmap is set.
+    """
+    with open(file_path, 'rb') as f:
+        if not use_mmap:
+            yield f.read()
+        elif os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be memory-mapped.
+            yield b''
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield buf
 
-    # Write TXT Summary
-    with open(summary_txt, 'w', encoding='utf-8') as f:
-        for entry in summary_data:
-            f.write(f"# {entry['file_path']}\n")
-            f.write("## Packages and Imports\n")
-            for pkg, imp in entry['package_imports']:
-                f.write(f"- `{pkg}` | `{imp}`\n")
-            f.write("\n" + "="*40 + "\n\n")
-
-    # Write CSV Summary
-    with open(summary_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["File Path", "File Name", "Package", "Import"])
-        for entry in summary_data:
-            for pkg, imp in entry["package_imports"]:
-                writer.writerow([entry["file_path"], entry["file_name"], pkg, imp])
-
-    # Write Markdown Summary as a Table
-    with open(summary_md, 'w', encoding='utf-8') as f:
-        f.write("# Summary of Extracted Packages and Imports\n\n")
-        f.write("| File Path | File Name | Package | Import |\n")
-        f.write("|-----------|-----------|---------|--------|\n")
-        for entry in summary_data:
-            for pkg, imp in entry["package_imports"]:
-                f.write(f"| `{entry['file_path']}` | `{entry['file_name']}` | `{pkg}` | `{imp}` |\n")
+def extract_from_file(file_path, filetype='py', engine='regex'):
+    try:
+        with open_source(file_path, use_mmap=engine == 'mmap' or filetype == 'ipynb') as data:
+            return extract_from_source(data, filetype, file_path, engine)
+    except Exception as e:
+        print(f"[!] Error reading {file_path}: {e}")
+        return set(), set(), set()
+
+# Wheels, eggs, sdists and plain zip/tar archives, scanned in place with --archives.
+ARCHIVE_SUFFIXES = ('.whl', '.egg', '.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ARCHIVE_MEMBER_SEP = '!'
+
+def source_filetype(name):
+    if name.endswith('.py'):
+        return 'py'
+    if name.endswith('.ipynb'):
+        return 'ipynb'
+    return None
+
+def archive_member_path(archive, member):
+    return Path(f"{archive}{ARCHIVE_MEMBER_SEP}{member}")
+
+def split_archive_path(file_path):
+    """
+    Returns (archive, member) for an 'archive!member' path, or None for a regular file.
+    """
+    archive, sep, member = str(file_path).partition(ARCHIVE_MEMBER_SEP)
+    if sep and archive.endswith(ARCHIVE_SUFFIXES):
+        return Path(archive), member
+    return None
+
+def safe_member_name(name):
+    """
+    Returns an archive member name as a relative path with no '..', '.' or empty parts,
+    so that outputs derived from it stay inside their destination; '' if nothing is left.
+    """
+    parts = name.replace('\\', '/').split('/')
+    return '/'.join(part for part in parts if part not in ('', '.', '..'))
+
+def iter_archive_members(archive):
+    """
+    Yields (member, filetype, data) for every Python and Jupyter member of a zip or
+    tar archive. Members are read into memory one at a time and nothing is written
+    to disk; tar archives are read as a single sequential stream. Member names are
+    cleaned with safe_member_name.
+    """
+    import zipfile
+    import tarfile
+
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                name = safe_member_name(info.filename)
+                filetype = source_filetype(name)
+                if filetype is not None and not info.is_dir():
+                    yield name, filetype, zf.read(info)
+        return
+
+    with tarfile.open(archive, 'r|*') as tf:
+        for member in tf:
+            name = safe_member_name(member.name)
+            filetype = source_filetype(name)
+            if filetype is not None and member.isfile():
+                yield name, filetype, tf.extractfile(member).read()
+
+def hash_file(file_path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SummaryRecord:
+    """
+    One file's results: sorted tuples of strings, plus a (label, distribution) per
+    package aligned with packages, or () when the run did not classify. Records are
+    what the summary sinks and per-file writers consume.
+    """
+
+    __slots__ = ("file_path", "file_name", "packages", "imports", "imported_names", "package_types")
+
+    def __init__(self, file_path, file_name, packages, imports, imported_names, package_types=()):
+        self.file_path = file_path
+        self.file_name = file_name
+        self.packages = packages
+        self.imports = imports
+        self.imported_names = imported_names
+        self.package_types = package_types
+
+    @property
+    def package_imports(self):
+        return list(zip(self.packages, self.imports))
+
+    def described(self):
+        # Yields (package, label, distribution); label and distribution are None when unclassified.
+        types = self.package_types or ((None, None),) * len(self.packages)
+        for pkg, (label, dist) in zip(self.packages, types):
+            yield pkg, label, dist
+
+    def rows(self):
+        # Yields (package, import, label, distribution) in the order of package_imports.
+        for (pkg, label, dist), imp in zip(self.described(), self.imports):
+            yield pkg, imp, label, dist
+
+class StringTable:
+    """
+    Interns strings to dense integer IDs so each distinct string is stored once.
+    """
+
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def get(self, text):
+        return self.ids.get(text)
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+class ImportIndex:
+    """
+    Compact in-memory store of a whole scan. Directories, file names, packages,
+    statements and imported names live in StringTables; per-file lists are integer
+    IDs in flat arrays with an offsets array per list (file i owns ids[indptr[i]:indptr[i + 1]]),
+    so a file costs a few dozen bytes plus 4 bytes per item instead of a dict of sets
+    of strings. Iterating yields SummaryRecords, so the summary sinks consume it
+    directly, e.g. write_summary_files(index, root_dir).
+    """
+
+    def __init__(self):
+        self.directories = StringTable()
+        self.file_names = StringTable()
+        self.packages = StringTable()
+        self.statements = StringTable()
+        self.names = StringTable()
+        self.package_types = []  # (label, distribution) per package ID, None when unclassified
+        self.file_directory = array('I')
+        self.file_name = array('I')
+        self.package_indptr = array('Q', [0])
+        self.package_ids = array('I')
+        self.import_indptr = array('Q', [0])
+        self.import_ids = array('I')
+        self.name_indptr = array('Q', [0])
+        self.name_ids = array('I')
+
+    def add(self, record):
+        """
+        Appends a SummaryRecord and returns its file ID.
+        """
+        file_id = len(self.file_name)
+        self.file_directory.append(self.directories.add(record.file_path))
+        self.file_name.append(self.file_names.add(record.file_name))
+        for pkg, label, dist in record.described():
+            package_id = self.packages.add(pkg)
+            if package_id == len(self.package_types):
+                self.package_types.append((label, dist) if label is not None else None)
+            self.package_ids.append(package_id)
+        self.package_indptr.append(len(self.package_ids))
+        self.import_ids.extend(self.statements.add(imp) for imp in record.imports)
+        self.import_indptr.append(len(self.import_ids))
+        self.name_ids.extend(self.names.add(name) for name in record.imported_names)
+        self.name_indptr.append(len(self.name_ids))
+        return file_id
+
+    def __len__(self):
+        return len(self.file_name)
+
+    def path(self, file_id):
+        return str(Path(self.directories[self.file_directory[file_id]]) / self.file_names[self.file_name[file_id]])
+
+    def __getitem__(self, file_id):
+        start, end = self.package_indptr[file_id], self.package_indptr[file_id + 1]
+        package_ids = self.package_ids[start:end]
+        types = [self.package_types[package_id] for package_id in package_ids]
+        statements = self.statements.strings
+        names = self.names.strings
+        return SummaryRecord(
+            self.directories[self.file_directory[file_id]],
+            self.file_names[self.file_name[file_id]],
+            tuple(self.packages[package_id] for package_id in package_ids),
+            tuple(statements[i] for i in self.import_ids[self.import_indptr[file_id]:self.import_indptr[file_id + 1]]),
+            tuple(names[i] for i in self.name_ids[self.name_indptr[file_id]:self.name_indptr[file_id + 1]]),
+            tuple(types) if None not in types else (),
+        )
+
+    def __iter__(self):
+        for file_id in range(len(self)):
+            yield self[file_id]
+
+    def importers(self, package):
+        """
+        Returns the paths of the files importing package, in scan order.
+        """
+        package_id = self.packages.get(package)
+        if package_id is None:
+            return []
+        indptr = self.package_indptr
+        paths = []
+        for file_id in range(len(self)):
+            if package_id in self.package_ids[indptr[file_id]:indptr[file_id + 1]]:
+                paths.append(self.path(file_id))
+        return paths
+
+    def package_counts(self):
+        """
+        Returns {package: number of files importing it}.
+        """
+        counts = [0] * len(self.packages)
+        for package_id in self.package_ids:
+            counts[package_id] += 1
+        return dict(zip(self.packages.strings, counts))
+
+    def nbytes(self):
+        # Approximate footprint of the ID arrays and the distinct strings.
+        arrays = (self.file_directory, self.file_name, self.package_indptr, self.package_ids,
+                  self.import_indptr, self.import_ids, self.name_indptr, self.name_ids)
+        tables = (self.directories, self.file_names, self.packages, self.statements, self.names)
+        return (sum(a.itemsize * len(a) for a in arrays)
+                + sum(sys.getsizeof(text) for table in tables for text in table.strings))
+
+STATEMENT_FROM_RE = re.compile(r'^\s*from\s+(\.*)([\w.]*)\s+import\s+(.*)', re.DOTALL)
+STATEMENT_IMPORT_RE = re.compile(r'^\s*import\s+(.*)', re.DOTALL)
+
+def parse_import_statement(statement):
+    """
+    Splits an import statement as recorded by the extractor into (level, module, names):
+    'from ..a.b import c, d as e' -> (2, 'a.b', ['c', 'd']), 'import x.y as z, w' ->
+    (0, None, ['x.y', 'w']). Returns None when it is not an import statement.
+    """
+    match = STATEMENT_FROM_RE.match(statement)
+    if match:
+        level, module, rest = len(match.group(1)), match.group(2), match.group(3)
+    else:
+        match = STATEMENT_IMPORT_RE.match(statement)
+        if match is None:
+            return None
+        level, module, rest = 0, None, match.group(1)
+    rest = rest.split('#', 1)[0].split(';', 1)[0]
+    names = []
+    for part in rest.replace('(', ' ').replace(')', ' ').replace('\\', ' ').split(','):
+        words = part.split()
+        if words:
+            names.append(words[0])
+    return level, module, names
+
+def module_names(paths):
+    """
+    Returns {path: (module, package)} for .py paths. A file's module name runs from
+    the first ancestor directory without an __init__.py, the way it would be imported
+    with that directory on sys.path; package is what its relative imports start from.
+    """
+    package_dirs = {os.path.dirname(path) for path in paths if os.path.basename(path) == '__init__.py'}
+    result = {}
+    for path in paths:
+        directory, name = os.path.split(path)
+        # The top of an archive's member tree is the archive itself ('dist.whl!pkg').
+        stem = name[:-3].rpartition(ARCHIVE_MEMBER_SEP)[2]
+        parts = [] if stem == '__init__' else [stem]
+        while directory in package_dirs:
+            parent, part = os.path.split(directory)
+            if not part or part in (os.curdir, os.pardir):
+                # The top of a relative path ('' or '.') has no name to add.
+                break
+            directory = parent
+            archive, sep, part = part.rpartition(ARCHIVE_MEMBER_SEP)
+            parts.append(part)
+            if sep:
+                break
+        parts.reverse()
+        module = '.'.join(parts)
+        package = module if stem == '__init__' else module.rpartition('.')[0]
+        result[path] = (module, package)
+    return result
+
+class ImportGraph:
+    """
+    Module-level import graph in CSR form: node i imports the nodes
+    indices[indptr[i]:indptr[i + 1]]. Nodes are the scanned files, named by module,
+    followed by one node per external top-level package; kinds[i] is 'module',
+    'package' or 'notebook' for scanned files and the classifier's label
+    ('standard', 'third-party', 'local', 'unknown') or 'unresolved' otherwise.
+    """
+
+    def __init__(self, names, paths, kinds, indptr, indices):
+        self.names = names
+        self.paths = paths
+        self.kinds = kinds
+        self.indptr = indptr
+        self.indices = indices
+        self.ids = {}
+        for node_id, name in enumerate(names):
+            self.ids.setdefault(name, node_id)
+        self._reverse = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def successors(self, node_id):
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def predecessors(self, node_id):
+        if self._reverse is None:
+            self._reverse = self.transpose()
+        indptr, indices = self._reverse
+        return indices[indptr[node_id]:indptr[node_id + 1]]
+
+    def transpose(self):
+        """
+        Returns (indptr, indices) of the reversed graph, built with one counting pass.
+        """
+        counts = [0] * (len(self) + 1)
+        for target in self.indices:
+            counts[target + 1] += 1
+        for i in range(len(self)):
+            counts[i + 1] += counts[i]
+        indptr = array('Q', counts)
+        indices = array('I', bytes(4 * len(self.indices)))
+        fill = counts[:-1]
+        for source in range(len(self)):
+            for target in self.indices[self.indptr[source]:self.indptr[source + 1]]:
+                indices[fill[target]] = source
+                fill[target] += 1
+        return indptr, indices
+
+    def to_dict(self):
+        return {
+            "modules": self.names,
+            "paths": self.paths,
+            "kinds": self.kinds,
+            "indptr": self.indptr.tolist(),
+            "indices": self.indices.tolist(),
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+            f.write("\n")
+        print(f"[✔] Wrote import graph ({len(self)} nodes, {self.edge_count} edges): {path}")
+
+class ImportGraphBuilder:
+    """
+    Collects the import statements of every scanned file and resolves them to the
+    concrete modules within the scanned root. 'from a.b import c' points at module
+    a.b.c when it was scanned, else at the longest scanned prefix of a.b; relative
+    imports are resolved against the importing file's package. Imports that do not
+    resolve point at a node for their top-level package.
+    """
+
+    def __init__(self, classifier=None):
+        self.classifier = classifier
+        self.paths = []
+        self.statements = StringTable()
+        self.statement_indptr = array('Q', [0])
+        self.statement_ids = array('I')
 
-    print(f"[✔] Wrote summary files: TXT, CSV, and MD")
+    def add(self, file_path, imports):
+        self.paths.append(str(file_path))
+        self.statement_ids.extend(self.statements.add(statement) for statement in imports)
+        self.statement_indptr.append(len(self.statement_ids))
 
-def write_individual_file(file_path, packages, imports):
+    def build(self):
+        paths = self.paths
+        modules = module_names([path for path in paths if path.endswith('.py')])
+        names, kinds, package_of = [], [], []
+        module_ids = {}
+        for node_id, path in enumerate(paths):
+            if path in modules:
+                module, package = modules[path]
+                kinds.append('package' if path.endswith('__init__.py') else 'module')
+                module_ids.setdefault(module, node_id)
+            else:
+                module, package = Path(path).stem, ''
+                kinds.append('notebook')
+            names.append(module)
+            package_of.append(package)
+        # Parsing is per distinct statement; 'import os' is parsed once, not once per file.
+        parsed = [parse_import_statement(statement) for statement in self.statements.strings]
+
+        external_ids = {}
+
+        def local_prefix(module):
+            while module:
+                node_id = module_ids.get(module)
+                if node_id is not None:
+                    return node_id
+                module = module.rpartition('.')[0]
+            return None
+
+        def external(name):
+            node_id = external_ids.get(name)
+            if node_id is None:
+                node_id = external_ids[name] = len(names) + len(external_ids)
+            return node_id
+
+        indptr = array('Q', [0])
+        indices = array('I')
+        for node_id in range(len(paths)):
+            targets = set()
+            start, end = self.statement_indptr[node_id], self.statement_indptr[node_id + 1]
+            for statement_id in self.statement_ids[start:end]:
+                statement = parsed[statement_id]
+                if statement is None:
+                    continue
+                level, module, imported = statement
+                written = '.' * level + (module or '')
+                if module is None:
+                    for name in imported:
+                        target = local_prefix(name)
+                        targets.add(target if target is not None else external(name.split('.')[0]))
+                    continue
+                if level:
+                    base = package_of[node_id].split('.') if package_of[node_id] else []
+                    if level - 1 > len(base):
+                        targets.add(external('.' * level + module))
+                        continue
+                    base = base[:len(base) - (level - 1)] + (module.split('.') if module else [])
+                    module = '.'.join(base)
+                for name in imported:
+                    target = module_ids.get(f"{module}.{name}" if module else name)
+                    if target is None:
+                        target = local_prefix(module)
+                    if target is None:
+                        if level:
+                            target = external(written if written.strip('.') else written + name)
+                        else:
+                            target = external(module.split('.')[0])
+                    targets.add(target)
+            targets.discard(node_id)
+            indices.extend(sorted(targets))
+            indptr.append(len(indices))
+
+        for name in external_ids:
+            indptr.append(len(indices))
+            names.append(name)
+            if name.startswith('.'):
+                kinds.append('unresolved')
+            elif self.classifier is not None:
+                kinds.append(self.classifier.classify(name))
+            else:
+                kinds.append('external')
+        return ImportGraph(names, paths + [None] * len(external_ids), kinds, indptr, indices)
+
+class SummarySink:
     """
-    Writes individual package and import lists for each file in CSV and MD formats.
+    Streaming writer for one summary file. Records are written as soon as they are
+    extracted and flushed every flush_every records, so memory stays constant and a
+    killed run still leaves the results found so far on disk.
     """
-    directory = file_path.parent.name
-    stem = file_path.stem
-    base_output_name = f"{directory}-{stem}"
-    out_dir = file_path.parent
 
-    md_path = out_dir / f"{base_output_name}_imports.md"
-    csv_path = out_dir / f"{base_output_name}_imports.csv"
+    filename = None
+    label = None
+
+    def __init__(self, root_dir, flush_every=256):
+        self.path = Path(root_dir) / self.filename
+        self.flush_every = flush_every
+        self.count = 0
+        self.f = open(self.path, 'w', newline='', encoding='utf-8')
+        self.write_header()
+
+    def write_header(self):
+        pass
+
+    def write_record(self, entry):
+        raise NotImplementedError
+
+    def write(self, entry):
+        self.write_record(entry)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class TxtSummarySink(SummarySink):
+    filename = "summary_all_packages.txt"
+    label = "TXT"
+
+    def write_record(self, entry):
+        self.f.write(f"# {entry.file_path}\n")
+        self.f.write("## Packages and Imports\n")
+        for pkg, imp, label, _ in entry.rows():
+            label = f" ({label})" if label else ""
+            self.f.write(f"- `{pkg}`{label} | `{imp}`\n")
+        self.f.write("\n" + "="*40 + "\n\n")
+
+class CsvSummarySink(SummarySink):
+    filename = "summary_all_packages.csv"
+    label = "CSV"
+
+    def write_header(self):
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(["File Path", "File Name", "Package", "Import", "Type", "Distribution"])
+
+    def write_record(self, entry):
+        for pkg, imp, label, dist in entry.rows():
+            self.writer.writerow([entry.file_path, entry.file_name, pkg, imp, label or "", dist or ""])
+
+class MarkdownSummarySink(SummarySink):
+    filename = "summary_all_packages.md"
+    label = "MD"
+
+    def write_header(self):
+        self.f.write("# Summary of Extracted Packages and Imports\n\n")
+        self.f.write("| File Path | File Name | Package | Import | Type |\n")
+        self.f.write("|-----------|-----------|---------|--------|------|\n")
+
+    def write_record(self, entry):
+        for pkg, imp, label, _ in entry.rows():
+            self.f.write(f"| `{entry.file_path}` | `{entry.file_name}` | `{pkg}` | `{imp}` | {label or ''} |\n")
+
+class SqliteSummarySink:
+    """
+    Writes records into an SQLite database with normalised, indexed tables, so
+    "which files import X" is an index lookup instead of a grep over text output.
+    A path may occur more than once (a tar archive may repeat a member).
+    Rows are inserted with executemany in one transaction per batch_size files;
+    indexes are built once at the end, which is faster than maintaining them.
+    """
+
+    label = "SQLite"
+    filename = "summary_all_packages.sqlite"
+
+    SCHEMA = """
+        CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT NOT NULL, directory TEXT NOT NULL, name TEXT NOT NULL);
+        CREATE TABLE packages (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, type TEXT, distribution TEXT);
+        CREATE TABLE file_packages (package_id INTEGER NOT NULL, file_id INTEGER NOT NULL,
+                                    PRIMARY KEY (package_id, file_id)) WITHOUT ROWID;
+        CREATE TABLE import_statements (file_id INTEGER NOT NULL, statement TEXT NOT NULL);
+        CREATE TABLE imported_names (file_id INTEGER NOT NULL, name TEXT NOT NULL);
+    """
+    INDEXES = """
+        CREATE INDEX files_path ON files (path);
+        CREATE INDEX files_name ON files (name);
+        CREATE INDEX file_packages_file ON file_packages (file_id);
+        CREATE INDEX import_statements_file ON import_statements (file_id);
+        CREATE INDEX imported_names_name ON imported_names (name);
+        CREATE INDEX imported_names_file ON imported_names (file_id);
+    """
+
+    def __init__(self, path, batch_size=1000):
+        import sqlite3
+
+        self.path = Path(path)
+        if self.path.exists():
+            self.path.unlink()
+        self.conn = sqlite3.connect(str(self.path))
+        # The database is rebuilt from scratch on every run, so durability can be traded for speed.
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.executescript(self.SCHEMA)
+        self.batch_size = batch_size
+        self.package_ids = {}
+        self.next_file_id = 1
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self.files = []
+        self.packages = []
+        self.file_packages = []
+        self.statements = []
+        self.names = []
+
+    def write(self, entry):
+        file_id = self.next_file_id
+        self.next_file_id += 1
+        directory, name = entry.file_path, entry.file_name
+        self.files.append((file_id, str(Path(directory) / name), directory, name))
+        for pkg, label, dist in entry.described():
+            package_id = self.package_ids.get(pkg)
+            if package_id is None:
+                package_id = self.package_ids[pkg] = len(self.package_ids) + 1
+                self.packages.append((package_id, pkg, label, dist or None))
+            self.file_packages.append((package_id, file_id))
+        self.statements.extend((file_id, statement) for statement in entry.imports)
+        self.names.extend((file_id, imported) for imported in entry.imported_names)
+        if len(self.files) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self.conn:
+            self.conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", self.files)
+            self.conn.executemany("INSERT INTO packages VALUES (?, ?, ?, ?)", self.packages)
+            self.conn.executemany("INSERT OR IGNORE INTO file_packages VALUES (?, ?)", self.file_packages)
+            self.conn.executemany("INSERT INTO import_statements VALUES (?, ?)", self.statements)
+            self.conn.executemany("INSERT INTO imported_names VALUES (?, ?)", self.names)
+        self._reset_batch()
+
+    def close(self):
+        self.flush()
+        self.conn.executescript(self.INDEXES)
+        self.conn.execute("ANALYZE")
+        self.conn.close()
+
+def query_importers(db_path, package):
+    """
+    Returns the paths of all files importing package (a top-level name such as
+    'requests', or a pin such as 'requests==2.31.0') from an SQLite summary.
+    """
+    import sqlite3
+
+    conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT files.path FROM packages "
+            "JOIN file_packages ON file_packages.package_id = packages.id "
+            "JOIN files ON files.id = file_packages.file_id "
+            "WHERE packages.name = ? ORDER BY files.path",
+            (package,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+SUMMARY_SINKS = (TxtSummarySink, CsvSummarySink, MarkdownSummarySink)
+
+def open_summary_sinks(root_dir, sqlite_path=None):
+    sinks = [sink_class(root_dir) for sink_class in SUMMARY_SINKS]
+    if sqlite_path:
+        sinks.append(SqliteSummarySink(sqlite_path))
+    return sinks
 
+def close_summary_sinks(sinks):
+    for sink in sinks:
+        sink.close()
+    labels = [sink.label for sink in sinks]
+    print(f"[✔] Wrote summary files: {', '.join(labels[:-1])}, and {labels[-1]}")
+
+def make_summary_record(fpath, packages, imports, imported_names, classifier=None):
+    packages = tuple(sorted(packages))
+    package_types = tuple(classifier.describe(pkg) for pkg in packages) if classifier else ()
+    return SummaryRecord(str(fpath.parent), fpath.name, packages, tuple(sorted(imports)),
+                         tuple(sorted(imported_names)), package_types)
+
+def write_summary_files(summary_data, root_dir):
+    # summary_data is any iterable of SummaryRecords, such as an ImportIndex.
+    sinks = open_summary_sinks(root_dir)
+    try:
+        for entry in summary_data:
+            for sink in sinks:
+                sink.write(entry)
+    finally:
+        close_summary_sinks(sinks)
+
+def individual_output_names(file_path):
+    """
+    Returns the (Markdown, CSV) file names of the per-file outputs for a source file.
+    Archive members are named after the archive and their full member path, since
+    the outputs of every member of an archive may share one directory.
+    """
+    archive = split_archive_path(file_path)
+    if archive:
+        member = archive[1].rsplit('.', 1)[0].replace('/', '-')
+        base_output_name = f"{archive[0].name}-{member}"
+    else:
+        base_output_name = f"{file_path.parent.name}-{file_path.stem}"
+    return f"{base_output_name}_imports.md", f"{base_output_name}_imports.csv"
+
+def render_individual_md(file_path, package_imports):
+    lines = [f"# Imports from `{file_path}`\n\n", "| Package | Import |\n", "|---------|--------|\n"]
+    lines.extend(f"| `{pkg}` | `{imp}` |\n" for pkg, imp in package_imports)
+    return ''.join(lines)
+
+def render_individual_csv(package_imports):
+    buf = io.StringIO(newline='')
+    writer = csv.writer(buf)
+    writer.writerow(["Package", "Import"])
+    for pkg, imp in package_imports:
+        writer.writerow([pkg, imp])
+    return buf.getvalue()
+
+def write_individual_file(file_path, packages, imports, out_dir=None):
+    """
+    Writes individual package and import lists for each file in CSV and MD formats,
+    next to the source file or into out_dir.
+    """
+    out_dir = file_path.parent if out_dir is None else out_dir
+    md_name, csv_name = individual_output_names(file_path)
     package_imports = list(zip(sorted(packages), sorted(imports)))
 
     # Write Markdown
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(f"# Imports from `{file_path}`\n\n")
-        f.write("| Package | Import |\n")
-        f.write("|---------|--------|\n")
-        for pkg, imp in package_imports:
-            f.write(f"| `{pkg}` | `{imp}` |\n")
+    with open(out_dir / md_name, 'w', encoding='utf-8') as f:
+        f.write(render_individual_md(file_path, package_imports))
 
     # Write CSV
-    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Package", "Import"])
-        for pkg, imp in package_imports:
-            writer.writerow([pkg, imp])
+    with open(out_dir / csv_name, 'w', newline='', encoding='utf-8') as f:
+        f.write(render_individual_csv(package_imports))
 
     print(f"[✔] Wrote individual CSV and MD outputs for: {file_path}")
 
-def walk_and_extract(root_dir):
-    summary_data = []
+class PerFileWriter:
+    """
+    Destination for per-file results. 'inline' writes two files next to every
+    source file, as before; the other modes avoid that inode churn.
+    """
+
+    def __init__(self, root_dir, dest=None):
+        self.root_dir = Path(root_dir)
+        self.dest = Path(dest) if dest else None
+        self.count = 0
+
+    def relative(self, file_path):
+        try:
+            return file_path.relative_to(self.root_dir)
+        except ValueError:
+            return Path(file_path.name)
+
+    def write(self, entry, file_path, packages, imports):
+        self.count += 1
+
+    def close(self):
+        pass
+
+class InlinePerFileWriter(PerFileWriter):
+    def write(self, entry, file_path, packages, imports):
+        super().write(entry, file_path, packages, imports)
+        # Archive members cannot get files next to them; their outputs go beside the archive.
+        archive = split_archive_path(file_path)
+        write_individual_file(file_path, packages, imports, archive[0].parent if archive else None)
+
+class DirectoryPerFileWriter(PerFileWriter):
+    default_name = "per_file_imports"
+
+    def write(self, entry, file_path, packages, imports):
+        super().write(entry, file_path, packages, imports)
+        out_dir = self.dest / self.relative(file_path).parent
+        try:
+            out_dir.resolve().relative_to(self.dest.resolve())
+        except ValueError:
+            print(f"[!] Skipping per-file outputs outside {self.dest}: {file_path}")
+            return
+        out_dir.mkdir(parents=True, exist_ok=True)
+        write_individual_file(file_path, packages, imports, out_dir)
+
+class ZipPerFileWriter(PerFileWriter):
+    default_name = "per_file_imports.zip"
+
+    def __init__(self, root_dir, dest=None):
+        import zipfile
+
+        super().__init__(root_dir, dest)
+        self.zip = zipfile.ZipFile(self.dest, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, entry, file_path, packages, imports):
+        super().write(entry, file_path, packages, imports)
+        folder = self.relative(file_path).parent
+        md_name, csv_name = individual_output_names(file_path)
+        package_imports = entry.package_imports
+        self.zip.writestr((folder / md_name).as_posix(), render_individual_md(file_path, package_imports))
+        self.zip.writestr((folder / csv_name).as_posix(), render_individual_csv(package_imports))
+
+    def close(self):
+        self.zip.close()
+        print(f"[✔] Wrote per-file outputs for {self.count} files to: {self.dest}")
+
+class JsonlPerFileWriter(PerFileWriter):
+    default_name = "per_file_imports.jsonl"
+
+    def __init__(self, root_dir, dest=None):
+        super().__init__(root_dir, dest)
+        self.f = open(self.dest, 'w', encoding='utf-8')
+
+    def write(self, entry, file_path, packages, imports):
+        super().write(entry, file_path, packages, imports)
+        record = {
+            "path": str(file_path),
+            "packages": entry.packages,
+            "imports": entry.imports,
+            "imported_names": entry.imported_names,
+            "types": {pkg: label for pkg, label, _ in entry.described() if label is not None},
+        }
+        self.f.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.f.close()
+        print(f"[✔] Wrote per-file outputs for {self.count} files to: {self.dest}")
+
+class NullPerFileWriter(PerFileWriter):
+    pass
+
+PER_FILE_WRITERS = {
+    "inline": InlinePerFileWriter,
+    "dir": DirectoryPerFileWriter,
+    "zip": ZipPerFileWriter,
+    "jsonl": JsonlPerFileWriter,
+    "none": NullPerFileWriter,
+}
+
+def open_per_file_writer(mode, root_dir, dest=None):
+    writer_class = PER_FILE_WRITERS[mode]
+    if dest is None and hasattr(writer_class, "default_name"):
+        dest = Path(root_dir) / writer_class.default_name
+    return writer_class(root_dir, dest)
+
+class ScanCache:
+    """
+    On-disk SQLite cache of per-file extraction results.
+
+    Entries are keyed by absolute path and validated by size and mtime first. When
+    those changed, the content hash decides whether the file really has to be parsed
+    again. Rows of files that were not seen during a run are pruned on close().
+    """
+
+    SCHEMA_VERSION = 4
+    DEFAULT_NAME = "summary_cache.sqlite"
+
+    def __init__(self, path, engine='regex'):
+        import sqlite3
 
-    for dirpath, _, filenames in os.walk(root_dir):
-        for fname in filenames:
-            fpath = Path(dirpath) / fname
-            if fname.endswith('.py'):
-                packages, imports = extract_from_file(fpath, 'py')
-            elif fname.endswith('.ipynb'):
-                packages, imports = extract_from_file(fpath, 'ipynb')
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT, result TEXT, run_id INTEGER)"
+        )
+        schema = f"{self.SCHEMA_VERSION}:{engine}"
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != schema:
+            # Results from another extractor version or engine cannot be trusted; start over.
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (schema,))
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()
+        self.run_id = int(row[0]) + 1 if row else 1
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('run_id', ?)", (str(self.run_id),))
+        self.conn.commit()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._seen = []
+        self._stores = []
+
+    @staticmethod
+    def encode_result(result):
+        if isinstance(result, list):
+            # An archive: one (member, result) pair per source member.
+            return json.dumps({"members": [[member, [sorted(part) for part in parts]] for member, parts in result]})
+        return json.dumps([sorted(part) for part in result])
+
+    @staticmethod
+    def decode_result(text):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return [(member, tuple(set(part) for part in parts)) for member, parts in data["members"]]
+        return tuple(set(part) for part in data)
+
+    def lookup(self, key, st):
+        """
+        Returns (fresh, digest, result) for a cached file, or None when it was never cached.
+        fresh is True when size and mtime still match, so the file need not be read at all.
+        """
+        row = self.conn.execute("SELECT size, mtime_ns, digest, result FROM files WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        size, mtime_ns, digest, result = row
+        fresh = size == st.st_size and mtime_ns == st.st_mtime_ns
+        if fresh:
+            self.hits += 1
+            self._seen.append((self.run_id, key))
+            if len(self._seen) >= 1000:
+                self.flush()
+        return fresh, digest, self.decode_result(result)
+
+    def store(self, key, st, digest, result, previous=None):
+        """
+        Records the result for a file that had to be read. previous is what lookup()
+        returned for it, used to tell a real content change from a mere touch.
+        """
+        if previous is not None:
+            if previous[1] == digest:
+                self.revalidated += 1
             else:
+                self.invalidations += 1
+        self._stores.append((key, st.st_size, st.st_mtime_ns, digest, self.encode_result(result), self.run_id))
+        if len(self._stores) >= 1000:
+            self.flush()
+
+    def flush(self):
+        with self.conn:
+            self.conn.executemany("UPDATE files SET run_id = ? WHERE path = ?", self._seen)
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", self._stores)
+        self._seen = []
+        self._stores = []
+
+    def close(self, prune=True):
+        # Only a completed walk knows which files are gone; an interrupted one must not prune.
+        self.flush()
+        if prune:
+            with self.conn:
+                self.conn.execute("DELETE FROM files WHERE run_id != ?", (self.run_id,))
+        self.conn.close()
+
+    def report(self):
+        total = self.hits + self.revalidated + self.misses + self.invalidations
+        hit_rate = (self.hits + self.revalidated) / total if total else 0.0
+        print(f"[INFO] Cache {self.path}: {self.hits} hits, {self.revalidated} revalidated by hash, "
+              f"{self.misses} misses, {self.invalidations} invalidations ({hit_rate:.1%} skipped parsing)")
+
+# Directories that never hold sources worth scanning; override with --no-default-excludes.
+DEFAULT_EXCLUDES = (
+    '.git', '.hg', '.svn', '__pycache__', '.venv', 'venv', 'node_modules', 'build', 'dist',
+    '.tox', '.nox', '.eggs', '*.egg-info', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.ipynb_checkpoints',
+)
+
+class GlobMatcher:
+    """
+    Matches entries against a list of shell globs compiled into one regex. Globs
+    containing '/' are matched against the path relative to the walk root, all
+    others against the entry name.
+    """
+
+    def __init__(self, patterns):
+        name_globs = [p.rstrip('/') for p in patterns if '/' not in p.rstrip('/')]
+        path_globs = [p.strip('/') for p in patterns if '/' in p.rstrip('/')]
+        self.name_re = re.compile('|'.join(map(fnmatch.translate, name_globs))) if name_globs else None
+        self.path_re = re.compile('|'.join(map(fnmatch.translate, path_globs))) if path_globs else None
+
+    def matches(self, name, relpath):
+        return bool((self.name_re and self.name_re.match(name)) or
+                    (self.path_re and self.path_re.match(relpath)))
+
+def _gitignore_regex(pattern):
+    """
+    Translates one .gitignore pattern (without '!' and trailing '/') into a regex
+    source matched against a path relative to the .gitignore's directory.
+    """
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append(f"[{body}]")
+            i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ('' if anchored else '(?:.*/)?') + ''.join(out) + r'\Z'
+
+class GitIgnore:
+    """
+    Rules of one .gitignore file, scoped to the directory it was found in.
+    """
+
+    def __init__(self, base, lines):
+        self.prefix = f"{base}/" if base else ''
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if line:
+                self.rules.append((re.compile(_gitignore_regex(line)), negate, dir_only))
+        # One combined regex per entry kind answers the common "no rule matches" case.
+        self.any_re = self._combine(self.rules)
+        self.any_file_re = self._combine([rule for rule in self.rules if not rule[2]])
+
+    @staticmethod
+    def _combine(rules):
+        return re.compile('|'.join(f"(?:{regex.pattern})" for regex, _, _ in rules)) if rules else None
+
+    @classmethod
+    def load(cls, path, base):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(base, f.readlines())
+        except OSError as e:
+            print(f"[!] Error reading {path}: {e}")
+            return None
+
+    def match(self, relpath, is_dir):
+        """
+        Returns True if the last matching rule ignores relpath, False if it re-includes
+        it with '!', and None if no rule applies.
+        """
+        if not relpath.startswith(self.prefix):
+            return None
+        relpath = relpath[len(self.prefix):]
+        any_re = self.any_re if is_dir else self.any_file_re
+        if any_re is None or not any_re.match(relpath):
+            return None
+        for regex, negate, dir_only in reversed(self.rules):
+            if (is_dir or not dir_only) and regex.match(relpath):
+                return not negate
+        return None
+
+def is_gitignored(gitignores, relpath, is_dir):
+    # Rules of deeper .gitignore files come later and take precedence.
+    ignored = False
+    for gitignore in gitignores:
+        result = gitignore.match(relpath, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+def iter_source_files(root_dir, excludes=DEFAULT_EXCLUDES, use_gitignore=True,
+                      skip_virtualenvs=True, follow_symlinks=False, include_archives=False, skip_paths=()):
+    """
+    Yields (path, filetype) for every Python and Jupyter file under root_dir, and
+    with include_archives also (path, 'archive') for every wheel, sdist or zip/tar archive.
+    Files and directories in skip_paths (the run's own outputs) are left out.
+
+    Built on os.scandir: excluded and .gitignore'd directories are pruned before
+    they are entered, directories containing pyvenv.cfg are skipped as virtualenvs,
+    and every directory and file is visited once per (st_dev, st_ino), so hardlinks
+    and symlink loops cannot cause repeated scans. Entries are visited in sorted,
+    depth-first order, so runs are reproducible.
+    """
+    exclude = GlobMatcher(excludes)
+    skip = {os.path.normcase(os.path.abspath(path)) for path in skip_paths}
+    root_st = os.stat(root_dir)
+    seen = {(root_st.st_dev, root_st.st_ino)}
+    stack = [(os.fspath(root_dir), '', root_st.st_dev, [])]
+
+    while stack:
+        dirpath, rel, dev, gitignores = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"[!] Error reading {dirpath}: {e}")
+            continue
+
+        if rel and skip_virtualenvs and any(entry.name == 'pyvenv.cfg' for entry in entries):
+            continue
+        if use_gitignore:
+            for entry in entries:
+                if entry.name == '.gitignore':
+                    gitignore = GitIgnore.load(entry.path, rel)
+                    if gitignore is not None:
+                        gitignores = gitignores + [gitignore]
+
+        subdirs = []
+        for entry in entries:
+            relpath = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                if is_dir:
+                    filetype = None
+                elif entry.name.endswith('.py'):
+                    filetype = 'py'
+                elif entry.name.endswith('.ipynb'):
+                    filetype = 'ipynb'
+                elif include_archives and entry.name.endswith(ARCHIVE_SUFFIXES):
+                    filetype = 'archive'
+                else:
+                    continue
+                if exclude.matches(entry.name, relpath) or is_gitignored(gitignores, relpath, is_dir):
+                    continue
+                if skip and os.path.normcase(os.path.abspath(entry.path)) in skip:
+                    continue
+                if is_dir:
+                    subdirs.append((entry, relpath))
+                    continue
+                if not entry.is_file():
+                    continue
+                if entry.is_symlink():
+                    st = entry.stat()
+                    key = (st.st_dev, st.st_ino)
+                else:
+                    # inode() comes from readdir and costs no syscall; files share their directory's device.
+                    key = (dev, entry.inode())
+            except OSError as e:
+                print(f"[!] Error reading {entry.path}: {e}")
                 continue
+            if key in seen:
+                continue
+            seen.add(key)
+            yield Path(entry.path), filetype
+
+        # Claim directories in sorted order, so the first name of a directory (not a
+        # later-sorting symlink to it) is the one walked.
+        kept = []
+        for entry, relpath in subdirs:
+            try:
+                st = entry.stat()
+            except OSError as e:
+                print(f"[!] Error reading {entry.path}: {e}")
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in seen:
+                continue
+            seen.add(key)
+            kept.append((entry.path, relpath, st.st_dev, gitignores))
+        # Push in reverse so directories are popped, and walked, in sorted order.
+        stack.extend(reversed(kept))
+
+def count_lines(buf):
+    if isinstance(buf, bytes):
+        return buf.count(b'\n')
+    # mmap has no count(); find() still runs in C per line.
+    count = 0
+    pos = buf.find(b'\n')
+    while pos >= 0:
+        count += 1
+        pos = buf.find(b'\n', pos + 1)
+    return count
 
+def _scan_file(fpath, filetype, known_digest=None, hash_content=False, engine='regex', stats=None):
+    """
+    Reads one file and extracts from it. Returns (digest, result); result is None
+    when the content hash equals known_digest and parsing was skipped. Timings and
+    sizes are added to the stats dict when one is given.
+    """
+    try:
+        start = time.perf_counter()
+        with open_source(fpath, use_mmap=engine == 'mmap' or filetype == 'ipynb') as data:
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest() if hash_content else None
+            if stats is not None:
+                read_done = time.perf_counter()
+                stats["read"] += read_done - start
+                stats["files_read"] += 1
+                stats["bytes_read"] += len(data)
+                if filetype == 'py':
+                    stats["lines"] += count_lines(data)
+            if digest is not None and digest == known_digest:
+                return digest, None
+            result = extract_from_source(data, filetype, fpath, engine)
+            if stats is not None:
+                stats["parse"] += time.perf_counter() - read_done
+                stats["files_parsed"] += 1
+            return digest, result
+    except Exception as e:
+        print(f"[!] Error reading {fpath}: {e}")
+        return None, (set(), set(), set())
+
+def _scan_archive(fpath, known_digest=None, hash_content=False, engine='regex', stats=None):
+    """
+    Extracts from every source member of an archive. Returns (digest, members) with
+    one (member, result) pair per member; members is None when the archive's hash
+    equals known_digest and it was not opened.
+    """
+    try:
+        digest = hash_file(fpath) if hash_content else None
+        if digest is not None and digest == known_digest:
+            return digest, None
+        members = []
+        start = time.perf_counter()
+        for member, filetype, data in iter_archive_members(fpath):
+            read_done = time.perf_counter()
+            result = extract_from_source(data, filetype, archive_member_path(fpath, member), engine)
+            if stats is not None:
+                stats["read"] += read_done - start
+                stats["parse"] += time.perf_counter() - read_done
+                stats["files_read"] += 1
+                stats["files_parsed"] += 1
+                stats["bytes_read"] += len(data)
+                if filetype == 'py':
+                    stats["lines"] += count_lines(data)
+            members.append((member, result))
+            start = time.perf_counter()
+        return digest, members
+    except Exception as e:
+        print(f"[!] Error reading {fpath}: {e}")
+        return None, []
+
+def _scan_batch(tasks, hash_content, engine):
+    # Runs inside a worker process; paths travel as strings to keep pickling cheap.
+    stats = dict.fromkeys(RunProfile.WORKER_STATS, 0)
+    results = []
+    for fpath, filetype, known_digest in tasks:
+        if filetype == 'archive':
+            results.append(_scan_archive(Path(fpath), known_digest, hash_content, engine, stats))
+        else:
+            results.append(_scan_file(Path(fpath), filetype, known_digest, hash_content, engine, stats))
+    return results, stats
+
+class RunProfile:
+    """
+    Per-phase wall time and counters for one extractor run, written as a JSON report
+    by --profile. read and parse happen in the workers, so with --jobs their times
+    are summed across processes rather than wall time.
+    """
+
+    PHASES = ("walk", "read", "parse", "classify", "write_per_file", "write_summary")
+    WORKER_STATS = ("read", "parse", "files_read", "files_parsed", "bytes_read", "lines")
+
+    def __init__(self, **context):
+        self.context = context
+        self.started = time.perf_counter()
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+        self.counters = {"files": 0, "files_with_imports": 0, "files_read": 0, "files_parsed": 0,
+                         "bytes_read": 0, "lines": 0, "records": 0, "per_file_records": 0}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def timed_iter(self, iterable, name):
+        # Charges the time spent producing each item (e.g. by the directory walk) to a phase.
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.timings[name] += time.perf_counter() - start
+                return
+            self.timings[name] += time.perf_counter() - start
+            yield item
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_worker_stats(self, stats):
+        for name in ("read", "parse"):
+            self.timings[name] += stats[name]
+        for name in ("files_read", "files_parsed", "bytes_read", "lines"):
+            self.counters[name] += stats[name]
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        return {
+            **self.context,
+            "wall_time_s": round(wall, 6),
+            "phases_s": {name: round(value, 6) for name, value in self.timings.items()},
+            "counters": dict(self.counters),
+            "files_per_s": round(self.counters["files"] / wall, 1) if wall else None,
+            "mb_read_per_s": round(self.counters["bytes_read"] / 1e6 / wall, 3) if wall else None,
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+        print(f"[✔] Wrote profile report: {path}")
+
+class _Completed:
+    # Stand-in for a Future when a batch is scanned in the calling process.
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+def iter_extracted(files, jobs=1, cache=None, engine='regex', batch_size=64, profile=None):
+    """
+    Yields (path, packages, imports, imported_names) for each (path, filetype) in files.
+    An archive yields one tuple per source member, with an 'archive!member' path.
+
+    With jobs > 1 the files are scanned in batches by a process pool, and every
+    archive is a batch of its own so archives are read in parallel. Results are
+    yielded in the same order as the input so the output matches a serial run.
+    When a ScanCache is given, files whose size and mtime are unchanged are never
+    read, and files whose content hash is unchanged are never parsed.
+    """
+    executor = None
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+
+    # Bound the number of in-flight batches so a huge tree does not pile up in memory.
+    max_pending = max(jobs, 1) * 4
+    pending = deque()
+    hash_content = cache is not None
+
+    def submit(batch):
+        tasks = [(str(fpath), filetype, cached[1] if cached else None)
+                 for fpath, filetype, _, _, cached in batch if not (cached and cached[0])]
+        if executor is None:
+            future = _Completed(_scan_batch(tasks, hash_content, engine))
+        else:
+            future = executor.submit(_scan_batch, tasks, hash_content, engine)
+        pending.append((batch, future))
+
+    def expand(fpath, filetype, result):
+        if filetype != 'archive':
+            yield (fpath, *result)
+            return
+        for member, member_result in result:
+            yield (archive_member_path(fpath, member), *member_result)
+
+    def drain(limit):
+        while len(pending) > limit:
+            batch, future = pending.popleft()
+            results, stats = future.result()
+            if profile is not None:
+                profile.add_worker_stats(stats)
+            scanned = iter(results)
+            for fpath, filetype, key, st, cached in batch:
+                if cached and cached[0]:
+                    yield from expand(fpath, filetype, cached[2])
+                    continue
+                digest, result = next(scanned)
+                if result is None:
+                    result = cached[2]
+                if cache is not None and st is not None and digest is not None:
+                    cache.store(key, st, digest, result, previous=cached)
+                yield from expand(fpath, filetype, result)
+
+    try:
+        batch = []
+        for fpath, filetype in files:
+            if filetype == 'archive' and batch:
+                submit(batch)
+                batch = []
+            key = st = cached = None
+            if cache is not None:
+                key = os.path.abspath(fpath)
+                try:
+                    st = os.stat(fpath)
+                    cached = cache.lookup(key, st)
+                except OSError:
+                    st = None
+            batch.append((fpath, filetype, key, st, cached))
+            if len(batch) >= batch_size or filetype == 'archive':
+                submit(batch)
+                batch = []
+                yield from drain(max_pending)
+        if batch:
+            submit(batch)
+        yield from drain(0)
+    finally:
+        if executor is not None:
+            # Cancel what has not started by hand; shutdown(cancel_futures=True) needs Python 3.9.
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown()
+
+def walk_and_extract(root_dir, jobs=1, cache_path=None, engine='regex', walk_options=None, profile=None,
+                     sqlite_path=None, per_file="inline", per_file_dest=None, index=None, graph=None):
+    """
+    Scans root_dir and writes the per-file and summary outputs. Returns the RunProfile
+    holding per-phase timings and counters for the run. When an ImportIndex is given,
+    every record is also added to it; when an ImportGraphBuilder is given, every
+    scanned file is added to it.
+    """
+    if profile is None:
+        profile = RunProfile()
+    profile.context.update(root_dir=str(root_dir), engine=engine, jobs=jobs, cache=cache_path is not None)
+    cache = ScanCache(cache_path, engine) if cache_path else None
+    with profile.phase("write_summary"):
+        sinks = open_summary_sinks(root_dir, sqlite_path)
+    with profile.phase("write_per_file"):
+        per_file_writer = open_per_file_writer(per_file, root_dir, per_file_dest)
+    with profile.phase("classify"):
+        classifier = ModuleClassifier(root_dir)
+
+    completed = False
+    try:
+        # The outputs may be written inside root_dir; e.g. a per-file zip must not be scanned as an archive.
+        outputs = [path for path in (per_file_writer.dest, sqlite_path, cache_path) if path]
+        files = profile.timed_iter(iter_source_files(root_dir, **(walk_options or {}), skip_paths=outputs), "walk")
+        extracted = iter_extracted(files, jobs=jobs, cache=cache, engine=engine, profile=profile)
+        for fpath, packages, imports, imported_names in extracted:
+            profile.count("files")
+            if graph is not None:
+                graph.add(fpath, sorted(imports))
             if packages or imports:
-                package_imports = list(zip(sorted(packages), sorted(imports)))
-                summary_data.append({
-                    "file_path": str(fpath.parent),
-                    "file_name": fpath.name,
-                    "package_imports": package_imports
-                })
-                write_individual_file(fpath, packages, imports)
+                with profile.phase("classify"):
+                    entry = make_summary_record(fpath, packages, imports, imported_names, classifier)
+                with profile.phase("write_summary"):
+                    for sink in sinks:
+                        sink.write(entry)
+                with profile.phase("write_per_file"):
+                    per_file_writer.write(entry, fpath, packages, imports)
+                profile.count("files_with_imports")
+                profile.count("per_file_records", per_file != "none")
+                profile.count("records", len(entry.package_imports))
+                if index is not None:
+                    index.add(entry)
+        completed = True
+    finally:
+        with profile.phase("write_per_file"):
+            per_file_writer.close()
+        with profile.phase("write_summary"):
+            close_summary_sinks(sinks)
+        if cache is not None:
+            cache.close(prune=completed)
+            cache.report()
+            profile.context.update(cache_hits=cache.hits, cache_revalidated=cache.revalidated,
+                                   cache_misses=cache.misses, cache_invalidations=cache.invalidations)
 
-    write_summary_files(summary_data, root_dir)
+    return profile
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description="Extract packages, import statements, and imported names from Python and Jupyter files.")
-    parser.add_argument("root_dir", help="Root directory to scan")
+    parser.add_argument("root_dir", help="Root directory to scan (or holding the SQLite summary for --who-imports)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes used to scan files (0 = one per CPU core)")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="PATH",
+                        help=f"Reuse results of unchanged files from an SQLite cache (default: <root_dir>/{ScanCache.DEFAULT_NAME})")
+    parser.add_argument("--engine", choices=ENGINES, default="regex",
+                        help="Extraction engine: line regexes, the Python AST with a byte-level pre-filter, "
+                             "or one bytes regex over each memory-mapped file")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Skip files and directories matching GLOB (repeatable)")
+    parser.add_argument("--no-default-excludes", action="store_true",
+                        help="Also scan VCS, cache, build and virtualenv directories")
+    parser.add_argument("--no-gitignore", action="store_true", help="Do not honour .gitignore files")
+    parser.add_argument("--follow-symlinks", action="store_true",
+                        help="Descend into symlinked directories (each directory is still scanned once)")
+    parser.add_argument("--archives", action="store_true",
+                        help="Also scan .py and .ipynb members of wheels, sdists and zip/tar archives in place, "
+                             "reported as 'archive!member'")
+    parser.add_argument("--sqlite", nargs="?", const="", default=None, metavar="PATH",
+                        help=f"Also write an indexed SQLite summary (default: <root_dir>/{SqliteSummarySink.filename})")
+    parser.add_argument("--who-imports", metavar="PACKAGE",
+                        help="Do not scan; list the files importing PACKAGE from an existing SQLite summary")
+    parser.add_argument("--per-file", choices=PER_FILE_WRITERS, default="inline",
+                        help="Where per-file results go: next to each source file (inline), mirrored into one "
+                             "directory (dir), one zip archive (zip), one JSON Lines stream (jsonl), or nowhere (none)")
+    parser.add_argument("--per-file-dest", metavar="PATH",
+                        help="Directory, zip or JSONL file for --per-file dir/zip/jsonl (default: inside root_dir)")
+    parser.add_argument("--graph", nargs="?", const="", default=None, metavar="PATH",
+                        help="Also write the module-level import graph, resolved to scanned files, as CSR arrays "
+                             "in JSON (default: <root_dir>/import_graph.json)")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="PATH",
+                        help="Write per-phase timings and counters as JSON (default: <root_dir>/extractor_profile.json)")
+    parser.add_argument("--cprofile", metavar="PATH", help="Also dump cProfile statistics of the run to PATH")
     args = parser.parse_args()
 
-    walk_and_extract(args.root_dir)
+    sqlite_path = None
+    if args.sqlite is not None or args.who_imports:
+        sqlite_path = args.sqlite or Path(args.root_dir) / SqliteSummarySink.filename
+    if args.who_imports:
+        import sqlite3
+
+        start = time.perf_counter()
+        try:
+            paths = query_importers(sqlite_path, args.who_imports)
+        except sqlite3.Error as e:
+            print(f"[!] Cannot query {sqlite_path} ({e}); run a scan with --sqlite first")
+            sys.exit(1)
+        for path in paths:
+            print(path)
+        print(f"[INFO] {len(paths)} files import '{args.who_imports}' ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        sys.exit(0)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache_path = None
+    if args.cache is not None:
+        cache_path = args.cache or Path(args.root_dir) / ScanCache.DEFAULT_NAME
+    walk_options = {
+        "excludes": args.exclude + ([] if args.no_default_excludes else list(DEFAULT_EXCLUDES)),
+        "use_gitignore": not args.no_gitignore,
+        "skip_virtualenvs": not args.no_default_excludes,
+        "follow_symlinks": args.follow_symlinks,
+        "include_archives": args.archives,
+    }
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    graph = ImportGraphBuilder(ModuleClassifier(args.root_dir)) if args.graph is not None else None
+    profile = walk_and_extract(args.root_dir, jobs=jobs, cache_path=cache_path, engine=args.engine,
+                               walk_options=walk_options, sqlite_path=sqlite_path,
+                               per_file=args.per_file, per_file_dest=args.per_file_dest, graph=graph)
+    if graph is not None:
+        start = time.perf_counter()
+        import_graph = graph.build()
+        print(f"[INFO] Resolved import graph in {time.perf_counter() - start:.2f}s")
+        import_graph.write_json(args.graph or Path(args.root_dir) / "import_graph.json")
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"[✔] Wrote cProfile statistics: {args.cprofile}")
+    if args.profile is not None:
+        profile.write(args.profile or Path(args.root_dir) / "extractor_profile.json")
@@ -0,0 +1,370 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from pathlib import Path
+
+EXTRACTOR_PATH = Path(__file__).with_name("2025-03-20-CGPT-4o-R07-RecursivePackageExtractor.py")
+
+# Cold-start budget for loading the extractor and classifying one module, on top of
+# bare interpreter startup.
+DEFAULT_STARTUP_BUDGET_MS = 50
+
+STARTUP_SNIPPET = f"""
+import importlib.util
+spec = importlib.util.spec_from_file_location("package_extractor", {str(EXTRACTOR_PATH)!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+module.classify_module("os")
+"""
+
+class ExtractorFinder:
+    """
+    Makes the extractor script importable as 'package_extractor' (its file name is
+    not a valid module name). Installed when this file is imported, so worker
+    processes started with spawn or forkserver, which re-import this file before
+    unpickling their tasks, can import it too.
+    """
+
+    def find_spec(self, name, path=None, target=None):
+        if name == "package_extractor":
+            return importlib.util.spec_from_file_location(name, EXTRACTOR_PATH)
+        return None
+
+if not any(isinstance(finder, ExtractorFinder) for finder in sys.meta_path):
+    sys.meta_path.append(ExtractorFinder())
+
+def load_extractor():
+    """
+    Imports the extractor script as the module 'package_extractor'.
+    """
+    import importlib
+    return importlib.import_module("package_extractor")
+
+def benchmark_engines(root_dir, engines=None, repeat=3):
+    """
+    Runs every extraction engine over the same in-memory copy of a tree and prints
+    files/s, MB/s and how far the engines' records differ from the regex engine.
+    """
+    extractor = load_extractor()
+    engines = engines or extractor.ENGINES
+
+    sources = []
+    for fpath, filetype in extractor.iter_source_files(root_dir):
+        try:
+            sources.append((fpath, filetype, fpath.read_bytes()))
+        except OSError as e:
+            print(f"[!] Error reading {fpath}: {e}")
+    total_bytes = sum(len(data) for _, _, data in sources)
+    print(f"[INFO] Loaded {len(sources)} files ({total_bytes / 1e6:.1f} MB) from {root_dir}")
+
+    results = {}
+    timings = {}
+    for engine in engines:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            records = [extractor.extract_from_source(data, filetype, fpath, engine)
+                       for fpath, filetype, data in sources]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[engine] = records
+        timings[engine] = best
+
+    print()
+    print(f"| Engine | Best of {repeat} (s) | Files/s | MB/s | Imports | Files differing from regex |")
+    print("|--------|---------------|---------|------|---------|----------------------------|")
+    reference = results.get("regex")
+    for engine in engines:
+        elapsed = timings[engine] or 1e-9
+        imports = sum(len(record[1]) for record in results[engine])
+        differing = "-"
+        if reference is not None and engine != "regex":
+            differing = sum(1 for a, b in zip(reference, results[engine]) if a != b)
+        print(f"| {engine} | {elapsed:.3f} | {len(sources) / elapsed:,.0f} | "
+              f"{total_bytes / 1e6 / elapsed:,.1f} | {imports} | {differing} |")
+
+    return timings
+
+def _time_python(code, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def benchmark_startup(runs=20, budget_ms=DEFAULT_STARTUP_BUDGET_MS):
+    """
+    Measures how much the extractor adds to interpreter cold start, including the
+    lazy standard-library table. Returns False when the median exceeds budget_ms.
+    """
+    baseline = _time_python("pass", runs)
+    loaded = _time_python(STARTUP_SNIPPET, runs)
+    overhead = statistics.median(loaded) - statistics.median(baseline)
+
+    print(f"| Run | Median (ms) | Min (ms) | Max (ms) |")
+    print("|-----|-------------|----------|----------|")
+    for label, timings in (("python -c pass", baseline), ("load extractor", loaded)):
+        print(f"| {label} | {statistics.median(timings):.1f} | {min(timings):.1f} | {max(timings):.1f} |")
+    print()
+
+    if overhead > budget_ms:
+        print(f"[✘] Extractor startup overhead {overhead:.1f} ms exceeds the {budget_ms} ms budget")
+        return False
+    print(f"[✔] Extractor startup overhead {overhead:.1f} ms is within the {budget_ms} ms budget")
+    return True
+
+# Import targets drawn from when generating synthetic sources: stdlib, third-party and local.
+SYNTHETIC_MODULES = (
+    "os", "sys", "json", "re", "collections", "itertools", "pathlib", "typing", "logging", "datetime",
+    "numpy", "pandas", "requests", "scipy", "matplotlib", "yaml", "click", "attr",
+    "app", "app.models", "app.utils.helpers", "core.config", "core.db",
+)
+SYNTHETIC_FILLER = (
+    "def handler_{n}(event, context=None):\n",
+    "    value_{n} = compute(event['key_{n}'], retries={n} % 5)\n",
+    "    if value_{n} == {n}:\n",
+    "        return {{'status': 'ok', 'id': {n}}}\n",
+    "# A comment line that does not import anything ({n}).\n",
+    "class Model{n}(Base):\n    field_{n} = Column(Integer)\n",
+    "    return [item for item in items_{n} if item is not None]\n",
+)
+PHASES = ("walk", "extract", "full")
+
+def synthetic_import(rng):
+    module = rng.choice(SYNTHETIC_MODULES)
+    form = rng.random()
+    if form < 0.4:
+        return f"import {module}\n"
+    if form < 0.55:
+        return f"import {module} as {module.split('.')[-1][:2]}_{rng.randrange(100)}\n"
+    if form < 0.85:
+        return f"from {module} import name_{rng.randrange(50)}, other_{rng.randrange(50)}\n"
+    return f"from {module} import (\n    first_{rng.randrange(50)},\n    second_{rng.randrange(50)},\n)\n"
+
+def synthetic_source(rng, size, import_density):
+    lines = []
+    written = 0
+    n = 0
+    while written < size:
+        if rng.random() < import_density:
+            line = synthetic_import(rng)
+        else:
+            line = rng.choice(SYNTHETIC_FILLER).format(n=n)
+            n += 1
+        lines.append(line)
+        written += len(line)
+    return ''.join(lines)
+
+def generate_synthetic_tree(root, files=1000, file_size=4000, import_density=0.1, notebook_ratio=0.1,
+                            notebook_output_size=100_000, files_per_dir=50, seed=0):
+    """
+    Writes a reproducible tree of .py files and notebooks under root and returns the
+    total number of source bytes. Notebooks get one base64 'image' output of
+    notebook_output_size bytes per code cell, like plots embedded by Jupyter.
+    """
+    rng = random.Random(seed)
+    output_blob = base64.b64encode(rng.randbytes(notebook_output_size * 3 // 4)).decode('ascii')
+    total_bytes = 0
+    for index in range(files):
+        directory = Path(root) / f"pkg_{index // (files_per_dir * 10)}" / f"sub_{index // files_per_dir}"
+        directory.mkdir(parents=True, exist_ok=True)
+        if rng.random() < notebook_ratio:
+            cells = []
+            for cell in range(3):
+                source = synthetic_source(rng, file_size // 3, import_density)
+                cells.append({
+                    "cell_type": "code", "execution_count": cell, "metadata": {},
+                    "source": source.splitlines(True),
+                    "outputs": [{"output_type": "display_data", "metadata": {},
+                                 "data": {"image/png": output_blob, "text/plain": ["<Figure>"]}}],
+                })
+            content = json.dumps({"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5})
+            path = directory / f"notebook_{index}.ipynb"
+        else:
+            content = synthetic_source(rng, file_size, import_density)
+            path = directory / f"module_{index}.py"
+        path.write_text(content, encoding='utf-8')
+        total_bytes += len(content.encode('utf-8'))
+    return total_bytes
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS; workers are counted via RUSAGE_CHILDREN.
+    import resource
+
+    scale = 1 / 1024 / 1024 if platform.system() == "Darwin" else 1 / 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) * scale, 1)
+
+def run_phase(phase, root_dir, engine, jobs, per_file, result_path):
+    """
+    Runs one phase in the current (fresh) process and writes its measurements to
+    result_path. Called through the hidden _phase subcommand so that peak RSS
+    belongs to that phase alone.
+    """
+    extractor = load_extractor()
+    start = time.perf_counter()
+    profile = None
+    if phase == "walk":
+        files = sum(1 for _ in extractor.iter_source_files(root_dir))
+    elif phase == "extract":
+        profile = extractor.RunProfile()
+        extracted = extractor.iter_extracted(extractor.iter_source_files(root_dir), jobs=jobs,
+                                             engine=engine, profile=profile)
+        files = sum(1 for _ in extracted)
+    else:
+        profile = extractor.walk_and_extract(root_dir, jobs=jobs, engine=engine, per_file=per_file)
+        files = profile.counters["files"]
+    elapsed = time.perf_counter() - start
+
+    result = {"seconds": round(elapsed, 4), "files": files, "peak_rss_mb": peak_rss_mb()}
+    if profile is not None:
+        report = profile.report()
+        result["phases_s"] = report["phases_s"]
+        result["counters"] = report["counters"]
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=EXTRACTOR_PATH.parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_synthetic(tree_options, engine="regex", jobs=1, per_file="none", phases=PHASES,
+                        output=None, compare=None, keep_tree=False):
+    """
+    Generates a synthetic tree, runs each phase in a fresh interpreter and reports
+    files/s, MB/s of file contents read and peak RSS. The results are written as JSON so that runs on
+    different commits can be compared with compare=<earlier results file>.
+    """
+    root_dir = Path(tempfile.mkdtemp(prefix="extractor-bench-"))
+    try:
+        start = time.perf_counter()
+        total_bytes = generate_synthetic_tree(root_dir, **tree_options)
+        print(f"[INFO] Generated {tree_options['files']} files ({total_bytes / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - start:.1f}s under {root_dir}")
+
+        results = {}
+        for phase in phases:
+            result_path = root_dir / f".bench_{phase}.json"
+            subprocess.run([sys.executable, __file__, "_phase", phase, str(root_dir), "--engine", engine,
+                            "--jobs", str(jobs), "--per-file", per_file, "--result", str(result_path)],
+                           check=True, stdout=subprocess.DEVNULL)
+            with open(result_path, encoding='utf-8') as f:
+                result = json.load(f)
+            seconds = result["seconds"] or 1e-9
+            result["files_per_s"] = round(result["files"] / seconds, 1)
+            # Throughput of the bytes the phase itself read; the walk phase reads no contents.
+            bytes_read = result.get("counters", {}).get("bytes_read")
+            result["mb_per_s"] = round(bytes_read / 1e6 / seconds, 2) if bytes_read else None
+            results[phase] = result
+    finally:
+        if keep_tree:
+            print(f"[INFO] Kept synthetic tree: {root_dir}")
+        else:
+            shutil.rmtree(root_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "tree": {**tree_options, "total_bytes": total_bytes},
+        "settings": {"engine": engine, "jobs": jobs, "per_file": per_file},
+        "results": results,
+    }
+
+    baseline = None
+    if compare:
+        with open(compare, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+
+    print()
+    print("| Phase | Seconds | Files/s | MB/s | Peak RSS (MB) |" + (" vs baseline |" if baseline else ""))
+    print("|-------|---------|---------|------|---------------|" + ("-------------|" if baseline else ""))
+    for phase, result in results.items():
+        row = (f"| {phase} | {result['seconds']:.3f} | {result['files_per_s']:,.0f} | "
+               f"{'-' if result['mb_per_s'] is None else format(result['mb_per_s'], ',.1f')} | "
+               f"{result['peak_rss_mb']} |")
+        if baseline:
+            old = baseline.get(phase)
+            row += f" {old['seconds'] / (result['seconds'] or 1e-9):.2f}x |" if old else " - |"
+        print(row)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n[✔] Wrote benchmark results: {output}")
+    return report
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the RecursivePackageExtractor.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    engines_parser = subparsers.add_parser("engines", help="Compare extraction engines on a tree")
+    engines_parser.add_argument("root_dir", help="Tree to benchmark the extraction engines on")
+    engines_parser.add_argument("--engine", action="append", dest="engines",
+                                help="Engine to include (repeatable; default: all engines)")
+    engines_parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best time is reported")
+
+    startup_parser = subparsers.add_parser("startup", help="Check extractor cold start against a budget")
+    startup_parser.add_argument("--runs", type=int, default=20, help="Interpreter launches per measurement")
+    startup_parser.add_argument("--budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                                help="Maximum allowed startup overhead in milliseconds")
+    synthetic_parser = subparsers.add_parser("synthetic", help="Benchmark the extractor on a generated tree")
+    synthetic_parser.add_argument("--files", type=int, default=2000, help="Number of source files")
+    synthetic_parser.add_argument("--file-size", type=int, default=4000, help="Approximate bytes of code per file")
+    synthetic_parser.add_argument("--import-density", type=float, default=0.1,
+                                  help="Fraction of generated lines that are import statements")
+    synthetic_parser.add_argument("--notebook-ratio", type=float, default=0.1, help="Fraction of files that are notebooks")
+    synthetic_parser.add_argument("--notebook-output-size", type=int, default=100_000,
+                                  help="Bytes of base64 output embedded in each notebook code cell")
+    synthetic_parser.add_argument("--seed", type=int, default=0, help="Seed for the tree generator")
+    synthetic_parser.add_argument("--engine", default="regex", help="Extraction engine to benchmark")
+    synthetic_parser.add_argument("-j", "--jobs", type=int, default=1, help="Worker processes for the extractor")
+    synthetic_parser.add_argument("--per-file", default="none", help="Per-file output mode for the 'full' phase")
+    synthetic_parser.add_argument("--phase", action="append", dest="phases", choices=PHASES,
+                                  help="Phase to run (repeatable; default: all)")
+    synthetic_parser.add_argument("--output", metavar="JSON", help="Write the results to this JSON file")
+    synthetic_parser.add_argument("--compare", metavar="JSON", help="Earlier results to show speedups against")
+    synthetic_parser.add_argument("--keep-tree", action="store_true", help="Do not delete the generated tree")
+
+    phase_parser = subparsers.add_parser("_phase")
+    phase_parser.add_argument("phase", choices=PHASES)
+    phase_parser.add_argument("root_dir")
+    phase_parser.add_argument("--engine", default="regex")
+    phase_parser.add_argument("--jobs", type=int, default=1)
+    phase_parser.add_argument("--per-file", default="none")
+    phase_parser.add_argument("--result", required=True)
+    args = parser.parse_args()
+
+    if args.command == "engines":
+        benchmark_engines(args.root_dir, args.engines, args.repeat)
+    elif args.command == "startup":
+        if not benchmark_startup(args.runs, args.budget_ms):
+            sys.exit(1)
+    elif args.command == "synthetic":
+        tree_options = {
+            "files": args.files, "file_size": args.file_size, "import_density": args.import_density,
+            "notebook_ratio": args.notebook_ratio, "notebook_output_size": args.notebook_output_size,
+            "seed": args.seed,
+        }
+        benchmark_synthetic(tree_options, args.engine, args.jobs, args.per_file, args.phases or PHASES,
+                            args.output, args.compare, args.keep_tree)
+    else:
+        run_phase(args.phase, args.root_dir, args.engine, args.jobs, args.per_file, args.result)
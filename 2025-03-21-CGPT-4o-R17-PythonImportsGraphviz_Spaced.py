@@ -1,9 +1,83 @@
+import os
+import re
+import csv
+import json
+import math
 import subprocess
 import sys
+import time
 import shutil
+import hashlib
 import platform
-import graphviz
-from graphviz import Digraph
+import itertools
+import tempfile
+from html import escape
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import graphviz
+    from graphviz import Digraph
+except ImportError:
+    # Only the Graphviz renderer needs the graphviz package; the built-in one does not.
+    graphviz = Digraph = None
+
+# Above these sizes the diagram is aggregated: files are merged into their directories
+# (deepest level first) and rarely imported packages into one node per type, so that
+# 'dot' lays out a real project in seconds instead of minutes.
+DEFAULT_MAX_NODES = 150
+DEFAULT_MAX_EDGES = 400
+DEFAULT_MAX_PACKAGES = 40
+# Import statements are only drawn as edge labels on graphs at most this large,
+# and cut to LABEL_MAX_CHARS characters.
+EDGE_LABEL_LIMIT = 60
+LABEL_MAX_CHARS = 48
+
+# dot's hierarchical layout grows super-linearly with edges; past these sizes the
+# force-directed engines are used (neato for mid-sized graphs, sfdp beyond).
+DOT_MAX_NODES = 800
+DOT_MAX_EDGES = 2500
+NEATO_MAX_NODES = 1500
+CHEAPER_ENGINE = {"dot": "sfdp", "neato": "sfdp"}
+ENGINE_ATTRS = {
+    "neato": {"overlap": "false"},
+    "sfdp": {"overlap": "prism", "splines": "false"},
+}
+DEFAULT_RENDER_TIMEOUT = 60
+# A graph reduced after a timeout keeps this fraction of the node, edge and package limits.
+REDUCTION_FACTOR = 4
+DOT_NODE_RE = re.compile(r'^\t+n\d+ \[', re.MULTILINE)
+DOT_EDGE_RE = re.compile(r'^\t\w+ -> ', re.MULTILINE)
+
+# The R15/R16/R17 scripts differed only in these settings. Themes are applied with
+# -G/-N/-E flags at render time, so one DOT source serves every theme.
+THEMES = {
+    "R15": {"filename": "2025-03-21-CGPT-4o-R15-PythonImportsGraphviz",
+            "attrs": {"fontname": "Arial", "size": "10,7"}},
+    "R16_Arial": {"filename": "2025-03-21-CGPT-4o-R16-PythonImportsGraphviz_Arial",
+                  "attrs": {"fontname": "Arial", "size": "10,7"}},
+    "R16_Helvetica": {"filename": "2025-03-21-CGPT-4o-R16-PythonImportsGraphviz_Helvetica",
+                      "attrs": {"fontname": "Helvetica", "size": "10,7"}},
+    "R16_TimesRoman": {"filename": "2025-03-21-CGPT-4o-R16-PythonImportsGraphviz_TimesRoman",
+                       "attrs": {"fontname": "Times-Roman", "size": "10,7"}},
+    "R17_Spaced": {"filename": "2025-03-21-CGPT-4o-R17-PythonImportsGraphviz_Spaced",
+                   "attrs": {"fontname": "Arial", "size": "15,10", "nodesep": "2", "ranksep": "2"}},
+}
+DEFAULT_THEME = "R17_Spaced"
+
+KIND_STYLES = {
+    "standard": {"fillcolor": "#e8e8e8"},
+    "third-party": {"fillcolor": "#cfe2f3"},
+    "local": {"fillcolor": "#fff2cc"},
+    "module": {"fillcolor": "#fff2cc"},
+    "unknown": {"fillcolor": "#ffffff"},
+    "unresolved": {"fillcolor": "#ffffff", "style": "filled,dashed"},
+    "external": {"fillcolor": "#d9ead3"},
+}
+
+# Level-of-detail views (see render_levels) draw each of these kinds as one node.
+COLLAPSED_KINDS = {"standard": "standard library", "third-party": "third-party packages"}
 
 def print_graphviz_install_instructions():
     system = platform.system()
@@ -20,45 +94,1155 @@ def print_graphviz_install_instructions():
     else:
         print("Unsupported platform. Please install Graphviz manually from: https://graphviz.org/download/")
 
+# Probes Graphviz once per binary and caches the result on disk (probe_graphviz).
+GRAPHVIZ_CHECK_PATH = Path(__file__).with_name("2025-03-20-CGPT-4o-R01-CheckGraphvizInstall.py")
+
+@lru_cache(maxsize=None)
+def graphviz_capabilities():
+    """
+    Returns the path, version, layout engines and output formats of the installed
+    Graphviz (see probe_graphviz in the R01 check script), or None without a usable 'dot'.
+    """
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("check_graphviz_install", GRAPHVIZ_CHECK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    try:
+        return module.probe_graphviz()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
 def check_graphviz_executable():
-    if shutil.which("dot") is None:
+    if graphviz_capabilities() is None:
         print_graphviz_install_instructions()
         sys.exit(1)
 
-def create_import_diagram(output_format, filename):
+class ImportData:
+    """
+    Extractor results reduced to what a diagram needs: which file imports which
+    target, with the import statements when known. Targets are package names, or
+    the path of a scanned module when the import was resolved (kind 'module').
+    """
+
+    def __init__(self):
+        self.files = {}  # used as an ordered set
+        self.kinds = {}
+        self.edges = defaultdict(list)
+
+    def add_file(self, path):
+        self.files.setdefault(path, None)
+
+    def add(self, path, target, kind, statement=None):
+        self.add_file(path)
+        self.kinds.setdefault(target, kind or "unknown")
+        statements = self.edges[path, target]
+        if statement and statement not in statements:
+            statements.append(statement)
+
+IMPORT_STATEMENT_RE = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import\b|import\s+(.+))')
+
+def statement_modules(statement):
+    # Top-level modules an import statement names: {'os'} for 'from os.path import join'.
+    match = IMPORT_STATEMENT_RE.match(statement)
+    if not match:
+        return set()
+    if match.group(1):
+        return {match.group(1).split('.')[0]}
+    return {name.split()[0].split('.')[0] for name in match.group(2).split(',') if name.strip()}
+
+def _load_csv(path, data):
+    # summary_all_packages.csv: File Path, File Name, Package, Import[, Type, Distribution].
+    # Its Import column is not the statement of the row's package, so it is not used.
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            file_path = os.path.join(row["File Path"], row["File Name"])
+            data.add(file_path, row["Package"], row.get("Type"))
+
+def _load_records(records, data):
+    # per_file_imports.jsonl lines, or extractor SummaryRecords held in memory.
+    for record in records:
+        if isinstance(record, dict):
+            types = record.get("types", {})
+            data.add_file(record["path"])
+            for pkg in record["packages"]:
+                data.add(record["path"], pkg, types.get(pkg))
+        else:
+            file_path = os.path.join(record.file_path, record.file_name)
+            data.add_file(file_path)
+            # An edge is labelled with the statements that import its package ('pkg==1.0' is 'pkg').
+            statements = defaultdict(list)
+            for statement in record.imports:
+                for module in statement_modules(statement):
+                    statements[module].append(statement)
+            for pkg, label, _ in record.described():
+                for statement in statements.get(pkg.partition('==')[0], [None]):
+                    data.add(file_path, pkg, label, statement)
+
+def _load_graph(graph, data):
+    # import_graph.json (--graph) or an ImportGraph: CSR arrays over modules.
+    if not isinstance(graph, dict):
+        graph = graph.to_dict()
+    names, paths, kinds = graph["modules"], graph["paths"], graph["kinds"]
+    indptr, indices = graph["indptr"], graph["indices"]
+    for node_id, path in enumerate(paths):
+        if path is None:
+            continue
+        data.add_file(path)
+        for target in indices[indptr[node_id]:indptr[node_id + 1]]:
+            if paths[target] is None:
+                data.add(path, names[target], kinds[target])
+            else:
+                data.add(path, paths[target], "module")
+
+def load_import_data(source):
+    """
+    Builds ImportData from extractor output: a summary CSV, a per-file JSONL stream,
+    an import graph JSON file, or the in-memory records or ImportGraph themselves.
+    """
+    data = ImportData()
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith('.csv'):
+            _load_csv(path, data)
+        elif path.endswith('.jsonl'):
+            with open(path, encoding='utf-8') as f:
+                _load_records((json.loads(line) for line in f if line.strip()), data)
+        else:
+            with open(path, encoding='utf-8') as f:
+                content = json.load(f)
+            if isinstance(content, dict):
+                _load_graph(content, data)
+            else:
+                _load_records(content, data)
+    elif hasattr(source, "indptr"):
+        _load_graph(source, data)
+    else:
+        _load_records(source, data)
+    return data
+
+def common_root(paths):
+    # The directory aggregate() shows paths relative to.
+    root = os.path.commonpath(paths) if paths else ''
+    if root in paths:
+        root = os.path.dirname(root)
+    return root
+
+def aggregate(data, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES, max_packages=DEFAULT_MAX_PACKAGES,
+              report=True):
+    """
+    Maps files and targets to diagram nodes. Returns (nodes, edges): nodes maps a node
+    key to (label, kind, member count) and edges maps (source key, target key) to
+    (number of file-level imports, statements).
+
+    Packages beyond the max_packages most imported are merged per kind. Files are kept
+    as they are when the graph fits max_nodes and max_edges; otherwise they are merged
+    into their directories, one directory level at a time from the deepest. The last
+    level keeps one node per top-level directory plus one for the root's own files.
+    """
+    module_paths = [target for target, kind in data.kinds.items() if kind == "module"]
+    all_paths = list(dict.fromkeys([*data.files, *module_paths]))
+    root = common_root(all_paths)
+    relative = {path: os.path.relpath(path, root) if root else path for path in all_paths}
+
+    importers = Counter(target for _, target in data.edges if data.kinds[target] != "module")
+    kept = {target for target, _ in importers.most_common(max_packages)}
+    package_nodes = {}
+    for target, count in importers.items():
+        kind = data.kinds[target]
+        if target in kept:
+            package_nodes[target] = (f"pkg:{target}", target, kind)
+        else:
+            package_nodes[target] = (f"other:{kind}", f"other {kind} packages", kind)
+
+    def file_group(path, depth):
+        parts = relative[path].replace('\\', '/').split('/')
+        if depth >= len(parts):
+            return f"file:{path}", relative[path], "file"
+        directory = '/'.join(parts[:max(depth, 1)]) if len(parts) > 1 else ''
+
+        return f"dir:{directory}", f"{directory or os.path.basename(root) or '.'}/", "directory"
+
+    max_depth = max((relative[path].count(os.sep) + 1 for path in all_paths), default=1)
+    for depth in range(max_depth, -1, -1):
+        groups = {path: file_group(path, depth) for path in all_paths}
+        nodes = {}
+        for path, (key, label, kind) in groups.items():
+            label_, kind_, members = nodes.get(key, (label, kind, 0))
+            nodes[key] = (label_, kind_, members + 1)
+        for key, label, kind in package_nodes.values():
+            _, _, members = nodes.get(key, (label, kind, 0))
+            nodes[key] = (label, kind, members + 1)
+
+        edges = {}
+        for (path, target), statements in data.edges.items():
+            source = groups[path][0]
+            destination = groups[target][0] if target in groups else package_nodes[target][0]
+            if source == destination:
+                continue
+            count, merged = edges.get((source, destination), (0, []))
+            edges[source, destination] = (count + 1, merged + statements if len(merged) < 3 else merged)
+        if len(nodes) <= max_nodes and len(edges) <= max_edges:
+            break
+    if report and depth < max_depth:
+        print(f"[INFO] Aggregated {len(all_paths)} files and {len(importers)} packages into {len(nodes)} nodes "
+              f"(directory depth {depth})")
+    return nodes, edges
+
+def node_text(key, label, kind, members):
+    if kind == "directory":
+        return f"{label} ({members} file{'s' if members != 1 else ''})"
+    if key.startswith("other:"):
+        return f"{label} ({members})"
+    return label
+
+def edge_text(count, statements, small):
+    if small and count == 1 and len(statements) == 1:
+        return statements[0]
+    return str(count) if count > 1 else None
+
+def strongly_connected_components(node_keys, successors):
+    """
+    Returns {node: component number} using an iterative Tarjan search. Components
+    are numbered in the order Tarjan completes them, so every edge between two
+    components points from a higher number to a lower one.
+    """
+    index, lowlink, component = {}, {}, {}
+    stack, on_stack = [], set()
+    count = 0
+    for root in node_keys:
+        if root in index:
+            continue
+        work = [(root, iter(successors.get(root, ())))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors.get(child, ()))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component[member] = count
+                        if member == node:
+                            break
+                    count += 1
+    return component
+
+def transitive_reduction_edges(node_keys, edge_keys):
+    """
+    Returns the edges implied by longer paths: u -> w is redundant when w is also
+    reachable from u through another successor. Edges inside a cycle are never
+    removed; the reduction works on the graph of strongly connected components,
+    with reachability kept as one integer bitset per component.
+    """
+    successors = defaultdict(list)
+    for source, destination in edge_keys:
+        successors[source].append(destination)
+    component = strongly_connected_components(node_keys, successors)
+    condensed = defaultdict(set)
+    for source, destination in edge_keys:
+        if component[source] != component[destination]:
+            condensed[component[source]].add(component[destination])
+
+    reach = {}
+    redundant = set()
+    # Successor components have lower numbers, so their reach is known when needed.
+    for current in range(max(component.values(), default=-1) + 1):
+        through = 0
+        for child in condensed.get(current, ()):
+            through |= reach[child]
+        direct = 0
+        for child in condensed.get(current, ()):
+            if through >> child & 1:
+                redundant.add((current, child))
+            direct |= 1 << child
+        reach[current] = through | direct
+    return {(source, destination) for source, destination in edge_keys
+            if (component[source], component[destination]) in redundant}
+
+def simplify(nodes, edges, transitive_reduction=False, label_max=LABEL_MAX_CHARS):
+    """
+    Pre-render simplification of the aggregated graph, whose parallel edges are
+    already merged into one edge with a count. Optionally drops the edges implied by
+    others (transitive_reduction) and cuts statement labels to label_max characters.
+    Returns (nodes, edges, stats).
+    """
+    stats = {"reduced_edges": 0, "truncated_labels": 0}
+    if transitive_reduction:
+        redundant = transitive_reduction_edges(list(nodes), list(edges))
+        edges = {key: value for key, value in edges.items() if key not in redundant}
+        stats["reduced_edges"] = len(redundant)
+    if label_max:
+        for key, (count, statements) in edges.items():
+            if any(len(statement) > label_max for statement in statements):
+                stats["truncated_labels"] += 1
+                edges[key] = (count, [statement if len(statement) <= label_max else statement[:label_max - 1] + '…'
+                                      for statement in statements])
+    return nodes, edges, stats
+
+def prepare_graph(data, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES,
+                  max_packages=DEFAULT_MAX_PACKAGES, simplify_options=None):
+    """
+    Aggregates and simplifies ImportData into the (nodes, edges) that get drawn, and
+    reports the node and edge counts before and after. simplify_options are keyword
+    arguments for simplify().
+    """
+    nodes, edges = aggregate(data, max_nodes, max_edges, max_packages)
+    merged = len(edges)
+    nodes, edges, stats = simplify(nodes, edges, **(simplify_options or {}))
+    before_nodes = len(data.files) + sum(1 for target in data.kinds if target not in data.files)
+    statements = sum(max(len(statements), 1) for statements in data.edges.values())
+    details = [f"{merged} after merging parallel edges"]
+    if stats["reduced_edges"]:
+        details.append(f"{stats['reduced_edges']} removed by transitive reduction")
+    if stats["truncated_labels"]:
+        details.append(f"{stats['truncated_labels']} labels truncated")
+    print(f"[INFO] Graph: {before_nodes} nodes, {statements} import edges -> {len(nodes)} nodes, "
+          f"{len(edges)} edges ({'; '.join(details)})")
+    return nodes, edges
+
+def build_import_digraph(data, max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES,
+                         max_packages=DEFAULT_MAX_PACKAGES, output_format='png', simplify_options=None,
+                         clusters=False):
+    nodes, edges = prepare_graph(data, max_nodes, max_edges, max_packages, simplify_options)
+    return digraph_from_aggregate(nodes, edges, output_format, clusters)
+
+def cluster_tree(nodes):
+    """
+    Nests file and directory nodes by their parent directories: returns a tree of
+    {directory name: subtree}, where the None entry of a subtree lists its node keys.
+    """
+    tree = {}
+    for key, (label, kind, _) in nodes.items():
+        if kind == "file":
+            parts = label.replace('\\', '/').split('/')[:-1]
+        elif kind == "directory":
+            parts = key[len("dir:"):].split('/')[:-1]
+        else:
+            continue
+        branch = tree
+        for part in parts:
+            branch = branch.setdefault(part, {})
+        branch.setdefault(None, []).append(key)
+    return tree
+
+def digraph_from_aggregate(nodes, edges, output_format='png', clusters=False, links=None):
+    """
+    Returns the Digraph of an aggregated graph. With clusters, files and directories
+    are drawn inside nested 'cluster_*' subgraphs per directory; links maps node keys
+    to URLs (followed in SVG output).
+    """
+    small = len(edges) <= EDGE_LABEL_LIMIT
+
+    # Fonts, canvas size and spacing come from the theme (see theme_flags).
     dot = Digraph(comment='Python Imports and Packages', format=output_format)
-    dot.attr(rankdir='LR', fontsize='16', fontname='Arial')
-    dot.attr(size='15,10')  # larger canvas
-    dot.attr(nodesep='2')   # more horizontal spacing
-    dot.attr(ranksep='2')   # more vertical spacing
-
-    dot.node('proj', 'my_project/', shape='folder')
-    dot.node('main', 'main.py', shape='note')
-    dot.node('utils', 'utils/', shape='folder')
-    dot.node('init', '__init__.py', shape='note')
-    dot.node('helper', 'helper.py', shape='note')
-
-    dot.edge('proj', 'main')
-    dot.edge('proj', 'utils')
-    dot.edge('utils', 'init')
-    dot.edge('utils', 'helper')
-    dot.edge('main', 'helper', label='from utils.helper import greet', style='dashed')
-
-    dot.node('stdlib', 'Standard Library', shape='box')
-    dot.node('thirdparty', 'Third-Party Packages', shape='box')
-    dot.node('localmod', 'Local Modules', shape='box')
-
-    dot.edge('stdlib', 'main', label='import os')
-    dot.edge('thirdparty', 'main', label='import numpy as np')
-    dot.edge('localmod', 'main', label='from utils.helper import greet')
+    dot.attr(rankdir='LR', fontsize='16')
+    if not small:
+        # Generous spacing multiplies the layout area of big graphs, and a fixed canvas
+        # makes them unreadable; these override any theme.
+        dot.attr(nodesep='0.3', ranksep='1.2', size='')
+    dot.attr('edge', fontsize='10')
+
+    ids = {key: f"n{index}" for index, key in enumerate(nodes)}
+    links = links or {}
+
+    def add_node(graph, key):
+        label, kind, members = nodes[key]
+        if clusters and kind in ("file", "directory"):
+            # The cluster already shows the directory.
+            label = label.replace('\\', '/').rstrip('/').rsplit('/', 1)[-1] + ('/' if kind == "directory" else '')
+        text = node_text(key, label, kind, members)
+        attrs = {"URL": links[key]} if key in links else {}
+        if kind == "file":
+            graph.node(ids[key], text, shape='note', **attrs)
+        elif kind == "directory":
+            graph.node(ids[key], text, shape='folder', **attrs)
+        else:
+            style = {"style": "filled", **KIND_STYLES.get(kind, {})}
+            graph.node(ids[key], text, shape='box', **style, **attrs)
+
+    def add_cluster(graph, branch, path):
+        for key in branch.get(None, ()):
+            add_node(graph, key)
+        for name, child in branch.items():
+            if name is None:
+                continue
+            with graph.subgraph(name=f"cluster_{next(cluster_ids)}") as cluster:
+                cluster.attr(label=f"{path}{name}/", style='rounded', color='#999999')
+                add_cluster(cluster, child, f"{path}{name}/")
+
+    cluster_ids = itertools.count()
+    if clusters:
+        add_cluster(dot, cluster_tree(nodes), '')
+    for key, (_, kind, _) in nodes.items():
+        if not clusters or kind not in ("file", "directory"):
+            add_node(dot, key)
+
+    for (source, destination), (count, statements) in edges.items():
+        attrs = {}
+        text = edge_text(count, statements, small)
+        if text is not None:
+            attrs["label"] = text
+        if count > 1:
+            attrs["penwidth"] = f"{1 + math.log2(count):.1f}"
+        dot.edge(ids[source], ids[destination], **attrs)
+    return dot
+
+# Built-in renderer: writes SVG and ASCII trees in-process, with no Graphviz binary.
+BUILTIN_FORMATS = ('svg', 'txt')
+# With Graphviz installed, 'auto' still renders graphs up to this size in-process.
+BUILTIN_MAX_NODES = 300
+BARYCENTER_SWEEPS = 4
+
+def layered_layout(node_keys, edge_keys):
+    """
+    Sugiyama-style layering of a directed graph; returns a list of layers (lists of
+    node keys) from left to right.
+
+    Cycles are broken by reversing the back edges of a depth-first search, nodes are
+    put one layer after their latest predecessor (longest path, in topological order),
+    and each layer is ordered by a few barycenter sweeps against its neighbouring
+    layer. Every step is linear apart from the sorts, so the layout is O(E log V).
+    Edges spanning several layers are drawn as curves rather than routed through
+    dummy nodes.
+    """
+    successors = {key: [] for key in node_keys}
+    for source, destination in edge_keys:
+        successors[source].append(destination)
+
+    # 1. Reverse back edges found by an iterative depth-first search.
+    state = dict.fromkeys(node_keys, 0)  # 0 unvisited, 1 on the stack, 2 done
+    dag = {key: [] for key in node_keys}
+    for root in node_keys:
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state[child] == 1:
+                    dag[child].append(node)
+                    continue
+                dag[node].append(child)
+                if state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, iter(successors[child])))
+                    break
+            else:
+                state[node] = 2
+                stack.pop()
+
+    # 2. Longest-path layering in topological (Kahn) order.
+    indegree = dict.fromkeys(node_keys, 0)
+    for children in dag.values():
+        for child in children:
+            indegree[child] += 1
+    layer_of = dict.fromkeys(node_keys, 0)
+    queue = deque(key for key in node_keys if indegree[key] == 0)
+    while queue:
+        node = queue.popleft()
+        for child in dag[node]:
+            layer_of[child] = max(layer_of[child], layer_of[node] + 1)
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    layers = [[] for _ in range(max(layer_of.values(), default=-1) + 1)]
+    for key in node_keys:
+        layers[layer_of[key]].append(key)
+
+    # 3. Barycenter ordering, sweeping right then left.
+    predecessors = {key: [] for key in node_keys}
+    for node, children in dag.items():
+        for child in children:
+            predecessors[child].append(node)
+    position = {key: index for layer in layers for index, key in enumerate(layer)}
 
+    def reorder(layer, neighbours):
+        def barycenter(key):
+            linked = neighbours[key]
+            return sum(position[other] for other in linked) / len(linked) if linked else position[key]
+        layer.sort(key=barycenter)
+        for index, key in enumerate(layer):
+            position[key] = index
+
+    for _ in range(BARYCENTER_SWEEPS):
+        for layer in layers[1:]:
+            reorder(layer, predecessors)
+        for layer in reversed(layers[:-1]):
+            reorder(layer, dag)
+    return layers
+
+def render_svg(nodes, edges, layers, fontname='Arial', links=None):
+    """
+    Returns an SVG document drawing the aggregated graph left to right, one column
+    per layer, with the node colours of the Graphviz output. links maps node keys to URLs.
+    """
+    links = links or {}
+    char_width, node_height, row_gap, column_gap, margin = 7, 28, 14, 80, 20
+    texts = {key: node_text(key, *nodes[key]) for key in nodes}
+    widths = [max((len(texts[key]) * char_width + 24 for key in layer), default=0) for layer in layers]
+    # An empty graph still gives a (margins-only) valid canvas.
+    height = max(max((len(layer) for layer in layers), default=0) * (node_height + row_gap) - row_gap, 0)
+    boxes = {}
+    x = margin
+    for layer, width in zip(layers, widths):
+        offset = margin + (height - (len(layer) * (node_height + row_gap) - row_gap)) / 2
+        for index, key in enumerate(layer):
+            node_width = len(texts[key]) * char_width + 24
+            boxes[key] = (x + (width - node_width) / 2, offset + index * (node_height + row_gap), node_width)
+        x += width + column_gap
+    total_width = max(x - column_gap, margin) + margin
+    total_height = height + 2 * margin
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{total_width:.0f}" height="{total_height:.0f}" '
+        f'viewBox="0 0 {total_width:.0f} {total_height:.0f}" font-family="{escape(fontname)}" font-size="12">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10 z" fill="#555"/></marker></defs>',
+    ]
+    small = len(edges) <= EDGE_LABEL_LIMIT
+    for (source, destination), (count, statements) in edges.items():
+        sx, sy, sw = boxes[source]
+        dx, dy, dw = boxes[destination]
+        if sx < dx:
+            x1, x2 = sx + sw, dx
+        else:
+            # Edges reversed to break a cycle run right to left.
+            x1, x2 = sx, dx + dw
+        y1, y2 = sy + node_height / 2, dy + node_height / 2
+        bend = (x2 - x1) / 2 or column_gap / 2
+        width = 1 + math.log2(count) if count > 1 else 1
+        out.append(f'<path d="M{x1:.1f},{y1:.1f} C{x1 + bend:.1f},{y1:.1f} {x2 - bend:.1f},{y2:.1f} {x2:.1f},{y2:.1f}" '
+                   f'fill="none" stroke="#555" stroke-width="{width:.1f}" marker-end="url(#arrow)"/>')
+        text = edge_text(count, statements, small)
+        if text is not None:
+            out.append(f'<text x="{(x1 + x2) / 2:.1f}" y="{(y1 + y2) / 2 - 3:.1f}" text-anchor="middle" '
+                       f'font-size="10">{escape(text)}</text>')
+    for key, (x, y, node_width) in boxes.items():
+        kind = nodes[key][1]
+        style = KIND_STYLES.get(kind, {}) if kind not in ("file", "directory") else {}
+        dash = ' stroke-dasharray="4 2"' if "dashed" in style.get("style", "") else ''
+        rx = 0 if kind == "file" else 4
+        if key in links:
+            out.append(f'<a xlink:href="{escape(links[key])}">')
+        out.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{node_width}" height="{node_height}" rx="{rx}" '
+                   f'fill="{style.get("fillcolor", "#ffffff")}" stroke="#333"{dash}/>')
+        out.append(f'<text x="{x + node_width / 2:.1f}" y="{y + node_height / 2 + 4:.1f}" '
+                   f'text-anchor="middle">{escape(texts[key])}</text>')
+        if key in links:
+            out.append('</a>')
+    out.append('</svg>')
+    return '\n'.join(out) + '\n'
+
+def render_ascii(nodes, edges):
+    """
+    Returns the aggregated graph as an indented tree per root for a terminal. A node
+    reached again is printed once more with '^' and not expanded.
+    """
+    texts = {key: node_text(key, *nodes[key]) for key in nodes}
+    children = defaultdict(list)
+    has_parent = set()
+    for (source, destination), (count, _) in edges.items():
+        children[source].append((destination, count))
+        has_parent.add(destination)
+    for items in children.values():
+        items.sort(key=lambda item: texts[item[0]])
+    roots = [key for key in nodes if key not in has_parent]
+
+    lines = []
+    seen = set()
+    # Nodes only reachable through a cycle become roots once the real roots are done.
+    for root in roots + list(nodes):
+        if root in seen:
+            continue
+        stack = [(root, 1, '', True, True)]
+        while stack:
+            key, count, prefix, last, top = stack.pop()
+            suffix = f" [{count}]" if count > 1 else ""
+            if top:
+                line, child_prefix = texts[key], ''
+            else:
+                line = f"{prefix}{'`-- ' if last else '|-- '}{texts[key]}{suffix}"
+                child_prefix = prefix + ('    ' if last else '|   ')
+            if key in seen:
+                lines.append(line + " ^")
+                continue
+            lines.append(line)
+            seen.add(key)
+            items = children.get(key, [])
+            for index in range(len(items) - 1, -1, -1):
+                child, child_count = items[index]
+                stack.append((child, child_count, child_prefix, index == len(items) - 1, False))
+    return '\n'.join(lines) + '\n'
+
+def render_builtin(nodes, edges, filename, formats, theme=None, links=None):
+    """
+    Writes filename.svg and/or filename.txt with the built-in layout. Returns the written paths.
+    """
+    unsupported = [output_format for output_format in formats if output_format not in BUILTIN_FORMATS]
+    if unsupported:
+        raise ValueError(f"the built-in renderer writes {', '.join(BUILTIN_FORMATS)} only, not {', '.join(unsupported)}")
+    paths = []
+    for output_format in formats:
+        if output_format == 'svg':
+            layers = layered_layout(list(nodes), list(edges))
+            content = render_svg(nodes, edges, layers, (theme or {}).get("fontname", "Arial"), links)
+        else:
+            content = render_ascii(nodes, edges)
+        path = f"{filename}.{output_format}"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+def choose_renderer(renderer, formats, node_count):
+    """
+    Resolves renderer 'auto' to 'builtin' or 'graphviz'. Without Graphviz 'auto' is
+    always 'builtin'; with it, the built-in renderer is used when it can write every
+    requested format and either the graph is small enough to read without Graphviz's
+    routing or the installed Graphviz lacks one of the formats.
+    """
+    if renderer != "auto":
+        return renderer
+    capabilities = graphviz_capabilities() if Digraph is not None else None
+    if capabilities is None:
+        return "builtin"
+    if set(formats) <= set(BUILTIN_FORMATS) and (node_count <= BUILTIN_MAX_NODES or
+                                                 not set(formats) <= set(capabilities["formats"])):
+        return "builtin"
+    return "graphviz"
+
+def builtin_formats(formats):
+    # The requested formats the built-in renderer can write, with svg for the others.
+    unsupported = [output_format for output_format in formats if output_format not in BUILTIN_FORMATS]
+    if not unsupported:
+        return list(formats)
+    print(f"[!] The built-in renderer cannot write {', '.join(unsupported)}; writing svg instead")
+    return list(dict.fromkeys(output_format if output_format in BUILTIN_FORMATS else 'svg'
+                              for output_format in formats))
+
+def graphviz_formats(formats):
+    # The requested formats the installed Graphviz can write, with svg for the others.
+    capabilities = graphviz_capabilities()
+    unsupported = [output_format for output_format in formats
+                   if capabilities is not None and output_format not in capabilities["formats"]]
+    if not unsupported:
+        return list(formats)
+    print(f"[!] This Graphviz cannot write {', '.join(unsupported)}; writing svg instead")
+    return list(dict.fromkeys(output_format if output_format not in unsupported else 'svg'
+                              for output_format in formats))
+
+def theme_flags(attrs):
+    """
+    Returns Graphviz command-line flags applying a theme's attributes as defaults.
+    fontname applies to the graph, its nodes and its edges.
+    """
+    flags = []
+    for key, value in (attrs or {}).items():
+        flags.append(f"-G{key}={value}")
+        if key == "fontname":
+            flags += [f"-N{key}={value}", f"-E{key}={value}"]
+    return flags
+
+def graphviz_version():
+    # e.g. "dot - graphviz version 9.0.0 (20230911.1827)"; '' without Graphviz.
+    capabilities = graphviz_capabilities()
+    return capabilities["version"] if capabilities else ''
+
+class RenderCache:
+    """
+    Content-addressed store of rendered diagrams. An artifact is keyed by a hash of
+    the Graphviz version, the engine, its command-line flags, the format and the DOT
+    source, so any change to them is a miss. Hits are hardlinked (or copied, across
+    file systems) to the output path instead of running Graphviz.
+    """
+
+    DEFAULT_DIR = Path.home() / ".cache" / "python-imports-graphviz"
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else self.DEFAULT_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source, engine, flags, output_format):
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (graphviz_version(), engine, '\0'.join(flags), output_format):
+            digest.update(part.encode('utf-8') + b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def artifact(self, key, output_format):
+        return self.directory / key[:2] / f"{key}.{output_format}"
+
+    @staticmethod
+    def _place(src, dest):
+        if os.path.exists(dest) and os.path.samefile(src, dest):
+            # Already a link to src; renaming onto it would be a no-op that leaves tmp behind.
+            return
+        # Write beside dest under a name unique to this call and rename, so a reader
+        # never sees a half-written file and concurrent calls never share a temp file.
+        fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(dest)}.", suffix=".tmp",
+                                   dir=os.path.dirname(os.fspath(dest)) or '.')
+        os.close(fd)
+        try:
+            os.unlink(tmp)
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def fetch(self, key, output_format, path):
+        artifact = self.artifact(key, output_format)
+        if not artifact.exists():
+            self.misses += 1
+            return False
+        self._place(artifact, path)
+        self.hits += 1
+        return True
+
+    def store(self, key, output_format, path):
+        artifact = self.artifact(key, output_format)
+        artifact.parent.mkdir(parents=True, exist_ok=True)
+        self._place(path, artifact)
+
+def render_formats(source, filename, formats, engine='dot', theme=None, cache=None, timeout=None):
+    """
+    Lays out DOT source once and writes filename.<format> for every format. All -T/-o
+    pairs of one Graphviz invocation are rendered from the same layout, so extra
+    formats only cost their serialisation. theme holds graph attributes applied
+    with theme_flags. With a RenderCache, formats rendered before from the same
+    input are taken from it and Graphviz only runs for the rest. Graphviz is killed
+    and subprocess.TimeoutExpired raised after timeout seconds. Returns the written paths.
+    """
+    flags = theme_flags(theme)
+    capabilities = graphviz_capabilities()
+    # Every engine runs through the probed 'dot' binary with -K.
+    command = [capabilities["path"] if capabilities else "dot", f"-K{engine}", *flags]
+    paths = []
+    missing = []
+    for output_format in formats:
+        path = f"{filename}.{output_format}"
+        paths.append(path)
+        key = cache.key(source, engine, flags, output_format) if cache is not None else None
+        if key is not None and cache.fetch(key, output_format, path):
+            continue
+        command += [f"-T{output_format}", f"-o{path}"]
+        missing.append((key, output_format, path))
+    if missing:
+        for _, _, path in missing:
+            # The old output may be a hardlink into the cache; dot must not write through it.
+            if os.path.lexists(path):
+                os.unlink(path)
+        subprocess.run(command, input=source.encode('utf-8'), capture_output=True, check=True, timeout=timeout)
+        if cache is not None:
+            for key, output_format, path in missing:
+                cache.store(key, output_format, path)
+    return paths
+
+def dot_size(source):
+    return len(DOT_NODE_RE.findall(source)), len(DOT_EDGE_RE.findall(source))
+
+def engine_available(engine):
+    capabilities = graphviz_capabilities()
+    return capabilities is None or engine in capabilities["engines"]
+
+def choose_engine(node_count, edge_count):
+    if node_count <= DOT_MAX_NODES and edge_count <= DOT_MAX_EDGES:
+        return "dot"
+    if node_count <= NEATO_MAX_NODES and engine_available("neato"):
+        return "neato"
+    # Graphviz builds without GTS have no sfdp.
+    return "sfdp" if engine_available("sfdp") else "neato" if engine_available("neato") else "dot"
+
+class ReducedSource:
+    """
+    Builds, on first use, the DOT source of the same data aggregated REDUCTION_FACTOR
+    times harder; used when the full graph cannot be laid out within the budget.
+    """
+
+    def __init__(self, data, max_nodes, max_edges, max_packages, simplify_options=None):
+        self.args = (data, max(max_nodes // REDUCTION_FACTOR, 10), max(max_edges // REDUCTION_FACTOR, 20),
+                     max(max_packages // REDUCTION_FACTOR, 5), 'png', simplify_options)
+        self.source = None
+
+    def __call__(self):
+        if self.source is None:
+            self.source = build_import_digraph(*self.args).source
+        return self.source
+
+def render_within_budget(source, filename, formats, theme=None, cache=None, timeout=DEFAULT_RENDER_TIMEOUT,
+                         engine="auto", reduced=None):
+    """
+    Renders DOT source with an engine chosen by graph size (or the given one), giving
+    each attempt timeout seconds. After a timeout it falls back to a cheaper engine,
+    then to the reduced graph from the reduced() callable. Returns (paths, steps),
+    steps describing every attempt; raises TimeoutError when all of them time out.
+    """
+    node_count, edge_count = dot_size(source)
+    first = choose_engine(node_count, edge_count) if engine == "auto" else engine
+    attempts = [(first, source)]
+    if first in CHEAPER_ENGINE and engine_available(CHEAPER_ENGINE[first]):
+        attempts.append((CHEAPER_ENGINE[first], source))
+    if reduced is not None:
+        attempts.append((None, reduced))
+
+    steps = []
+    tried = set()
+    for attempt_engine, attempt_source in attempts:
+        label = "full graph"
+        if callable(attempt_source):
+            attempt_source = attempt_source()
+            label = "reduced graph"
+        attempt_nodes, attempt_edges = dot_size(attempt_source)
+        if attempt_engine is None:
+            attempt_engine = choose_engine(attempt_nodes, attempt_edges)
+        if (attempt_engine, attempt_source) in tried:
+            # A graph already under the reduced limits aggregates to the same source.
+            steps.append(f"{label} is unchanged; not retried")
+            continue
+        tried.add((attempt_engine, attempt_source))
+        label = f"{attempt_engine} on {label} ({attempt_nodes} nodes, {attempt_edges} edges)"
+        attrs = {**ENGINE_ATTRS.get(attempt_engine, {}), **(theme or {})}
+        start = time.perf_counter()
+        try:
+            paths = render_formats(attempt_source, filename, formats, attempt_engine, attrs, cache, timeout)
+        except subprocess.TimeoutExpired:
+            steps.append(f"{label} timed out after {timeout:g}s")
+            continue
+        steps.append(f"{label} in {time.perf_counter() - start:.1f}s")
+        return paths, steps
+    raise TimeoutError("; ".join(steps))
+
+def create_import_diagram(output_formats, filename, source, max_nodes=DEFAULT_MAX_NODES,
+                          max_edges=DEFAULT_MAX_EDGES, max_packages=DEFAULT_MAX_PACKAGES, theme=DEFAULT_THEME,
+                          cache=None, timeout=DEFAULT_RENDER_TIMEOUT, engine="auto", renderer="auto",
+                          simplify_options=None, clusters=False):
+    """
+    Renders a diagram of the imports in source (see load_import_data) to
+    filename.<format> for one format or a list of formats, with a single layout
+    bounded by timeout (see render_within_budget). renderer is 'graphviz',
+    'builtin' (svg and txt, in-process) or 'auto' (see choose_renderer).
+    simplify_options are passed to simplify(); clusters draws directories as nested
+    Graphviz clusters.
+    """
+    formats = [output_formats] if isinstance(output_formats, str) else list(output_formats)
+    data = source if isinstance(source, ImportData) else load_import_data(source)
+    nodes, edges = prepare_graph(data, max_nodes, max_edges, max_packages, simplify_options)
+    renderer = choose_renderer(renderer, formats, len(nodes))
+    formats = builtin_formats(formats) if renderer == "builtin" else graphviz_formats(formats)
+    try:
+        if renderer == "builtin":
+            start = time.perf_counter()
+            paths = render_builtin(nodes, edges, filename, formats, THEMES[theme]["attrs"])
+            print(f"[INFO] Layout: built-in layered layout ({len(nodes)} nodes, {len(edges)} edges) "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        else:
+            dot = digraph_from_aggregate(nodes, edges, formats[0], clusters)
+            reduced = ReducedSource(data, max_nodes, max_edges, max_packages, simplify_options)
+            paths, steps = render_within_budget(dot.source, filename, formats, THEMES[theme]["attrs"], cache,
+                                                timeout, engine, reduced)
+            print(f"[INFO] Layout: {' -> '.join(steps)}")
+        print(f"[✔] Diagram successfully rendered: {', '.join(paths)}")
+    except subprocess.CalledProcessError as e:
+        print(f"[✘] Failed to render diagram to {', '.join(formats)}: {e.stderr.decode(errors='replace').strip()}")
+    except Exception as e:
+        print(f"[✘] Failed to render diagram to {', '.join(formats)}: {e}")
+
+def _render_job(source, filename, formats, attrs, cache=None, timeout=DEFAULT_RENDER_TIMEOUT, engine="auto",
+                reduced=None):
+    start = time.perf_counter()
+    steps = []
     try:
-        dot.render(filename, cleanup=True)
-        print(f"[✔] Diagram successfully rendered: {{filename}}.{{output_format}}")
+        _, steps = render_within_budget(source, filename, formats, attrs, cache, timeout, engine, reduced)
+        error = None
+    except subprocess.CalledProcessError as e:
+        error = e.stderr.decode(errors='replace').strip() or str(e)
     except Exception as e:
-        print(f"[✘] Failed to render diagram to {{output_format}}: {{e}}")
+        error = str(e)
+    return time.perf_counter() - start, error, steps
+
+def render_matrix(source, themes=None, formats=('png', 'pdf'), output_dir='.', jobs=None,
+                  max_nodes=DEFAULT_MAX_NODES, max_edges=DEFAULT_MAX_EDGES, max_packages=DEFAULT_MAX_PACKAGES,
+                  cache=None, timeout=DEFAULT_RENDER_TIMEOUT, engine="auto", simplify_options=None, clusters=False):
+    """
+    Renders the diagram once per theme, every theme in all formats, concurrently.
+
+    The DOT source is built once and shared; each job is one Graphviz process that
+    applies its theme with flags and writes all formats from one layout. themes maps
+    names to {"filename": ..., "attrs": {...}} like THEMES (default: all of THEMES).
+    Every job is bounded by timeout like create_import_diagram.
+    Returns {theme: (seconds, error or None, layout steps)} and prints per-job timings.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    themes = THEMES if themes is None else themes
+    data = source if isinstance(source, ImportData) else load_import_data(source)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    dot_source = build_import_digraph(data, max_nodes, max_edges, max_packages, 'png', simplify_options,
+                                      clusters).source
+    reduced = ReducedSource(data, max_nodes, max_edges, max_packages, simplify_options)
+    build_time = time.perf_counter() - start
+    formats = graphviz_formats(formats)  # also probes once, not from every thread
+
+    # The layout work happens in the dot processes; threads only wait for them.
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = {
+            name: executor.submit(_render_job, dot_source, os.path.join(output_dir, theme["filename"]),
+                                  list(formats), theme.get("attrs"), cache, timeout, engine, reduced)
+            for name, theme in themes.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    wall = time.perf_counter() - start
+
+    print(f"\n| Theme | Formats | Seconds | Layout | Status |")
+    print(f"|-------|---------|---------|--------|--------|")
+    for name, (seconds, error, steps) in results.items():
+        status = "✔" if error is None else f"✘ {error}"
+        print(f"| {name} | {', '.join(formats)} | {seconds:.2f} | {' -> '.join(steps)} | {status} |")
+    print(f"\n[INFO] Built DOT source once in {build_time:.2f}s; {len(results)} render jobs took "
+          f"{sum(result[0] for result in results.values()):.2f}s in total, {wall:.2f}s wall")
+    return results
+
+def _level_view(data, files, parts, by_file, relative):
+    """
+    ImportData of one level-of-detail view: the imports of files, the view's directory
+    being parts. Modules outside the view become one 'external' node per directory next
+    to the view, and COLLAPSED_KINDS packages one node per kind.
+    """
+    view = ImportData()
+    inside = set(files)
+    for path in files:
+        view.add_file(path)
+        for target, statements in by_file[path]:
+            kind = data.kinds[target]
+            if kind == "module" and target not in inside:
+                target_parts = relative[target]
+                shared = 0
+                while shared < min(len(parts), len(target_parts) - 1) and target_parts[shared] == parts[shared]:
+                    shared += 1
+                target = '/'.join(target_parts[:shared + 1]) + ('/' if shared + 1 < len(target_parts) else '')
+                kind = "external"
+            elif kind in COLLAPSED_KINDS:
+                target = COLLAPSED_KINDS[kind]
+            for statement in statements or [None]:
+                view.add(path, target, kind, statement)
+    return view
+
+def _common_parts(parts_list):
+    # common_root() on paths split into parts.
+    prefix = tuple(os.path.commonprefix(parts_list))
+    if any(len(parts) == len(prefix) for parts in parts_list):
+        prefix = prefix[:-1]
+    return prefix
+
+def render_levels(source, formats=('svg',), output_dir='.', levels=2, jobs=None, max_nodes=DEFAULT_MAX_NODES,
+                  max_edges=DEFAULT_MAX_EDGES, max_packages=DEFAULT_MAX_PACKAGES, theme=DEFAULT_THEME, cache=None,
+                  timeout=DEFAULT_RENDER_TIMEOUT, engine="auto", renderer="auto", simplify_options=None):
+    """
+    Writes a level-of-detail set of diagrams to output_dir instead of one big one:
+    'overview' has a node per top-level directory, and every directory a view had to
+    merge gets its own drill-down view ('view_<path>'), down to levels levels.
+
+    Each view is aggregated within max_nodes/max_edges on its own, draws directories
+    as nested clusters, shows the standard library and third-party packages as one
+    node each and links directory nodes to their drill-downs. The views are built
+    and rendered concurrently. Returns {view name: (seconds, error or None)}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    start = time.perf_counter()
+    data = source if isinstance(source, ImportData) else load_import_data(source)
+    module_paths = [target for target, kind in data.kinds.items() if kind == "module"]
+    all_paths = list(dict.fromkeys([*data.files, *module_paths]))
+    root = common_root(all_paths)
+    relative = {path: tuple((os.path.relpath(path, root) if root else path).replace('\\', '/').split('/'))
+                for path in all_paths}
+    by_file = defaultdict(list)
+    for (path, target), statements in data.edges.items():
+        by_file[path].append((target, statements))
+
+    renderer = choose_renderer(renderer, formats, max_nodes)
+    formats = builtin_formats(formats) if renderer == "builtin" else graphviz_formats(formats)
+    link_format = 'svg' if 'svg' in formats else formats[0]
+    attrs = THEMES[theme]["attrs"]
+
+    def render_view(name, nodes, edges, view, links):
+        filename = os.path.join(output_dir, name)
+        if renderer == "graphviz":
+            dot = digraph_from_aggregate(nodes, edges, formats[0], True, links)
+            reduced = ReducedSource(view, max_nodes, max_edges, max_packages, simplify_options)
+            return _render_job(dot.source, filename, formats, attrs, cache, timeout, engine, reduced)[:2]
+        view_start = time.perf_counter()
+        try:
+            render_builtin(nodes, edges, filename, formats, attrs, links)
+            error = None
+        except Exception as e:
+            error = str(e)
+        return time.perf_counter() - view_start, error
+
+    os.makedirs(output_dir, exist_ok=True)
+    names = {"overview"}
+    pending = deque([("overview", (), list(data.files), 1)])
+    futures = {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        while pending:
+            name, parts, files, level = pending.popleft()
+            view = _level_view(data, files, parts, by_file, relative)
+            # The overview always stops at the top-level directories.
+            limits = (0, 0) if level == 1 else (max_nodes, max_edges)
+            nodes, edges = aggregate(view, *limits, max_packages, report=False)
+            nodes, edges, _ = simplify(nodes, edges, **(simplify_options or {}))
+
+            links = {}
+            if level < levels:
+                base = _common_parts([relative[path] for path in
+                                      dict.fromkeys([*view.files, *(target for target, kind in view.kinds.items()
+                                                                    if kind == "module")])])
+                children = {}
+                for key, (_, kind, members) in nodes.items():
+                    if kind == "directory" and key != "dir:" and members > 1:
+                        children[base + tuple(key[len("dir:"):].split('/'))] = key
+                child_files = defaultdict(list)
+                own_files = []
+                for path in files:
+                    path_parts = relative[path]
+                    if len(path_parts) == len(base) + 1:
+                        own_files.append(path)
+                    for end in range(len(base) + 1, len(path_parts)):
+                        if path_parts[:end] in children:
+                            child_files[path_parts[:end]].append(path)
+                            break
+                # 'dir:' holds the files directly in the view's directory; it gets a
+                # drill-down of those files unless they are all the view has.
+                if nodes.get("dir:", (None, None, 0))[2] > 1 and len(own_files) < len(files):
+                    children[base + ("",)] = "dir:"
+                    child_files[base + ("",)] = own_files
+                for child_parts, key in children.items():
+                    child = "view_" + re.sub(r'[^\w.-]+', '_', '/'.join(child_parts).rstrip('/'))
+                    if key == "dir:":
+                        child += "_files" if child != "view_" else "root_files"
+                    while child in names:
+                        child += "_"
+                    names.add(child)
+                    links[key] = f"{child}.{link_format}"
+                    pending.append((child, child_parts[:len(base)] if key == "dir:" else child_parts,
+                                    child_files[child_parts], level + 1))
+            futures[name] = (len(nodes), len(edges), executor.submit(render_view, name, nodes, edges, view, links))
+        results = {name: future.result() for name, (_, _, future) in futures.items()}
+    wall = time.perf_counter() - start
+
+    print(f"\n| View | Nodes | Edges | Seconds | Status |")
+    print(f"|------|-------|-------|---------|--------|")
+    for name, (seconds, error) in results.items():
+        node_count, edge_count, _ = futures[name]
+        status = "✔" if error is None else f"✘ {error}"
+        print(f"| {name} | {node_count} | {edge_count} | {seconds:.2f} | {status} |")
+    print(f"\n[INFO] Wrote {len(results)} views ({', '.join(formats)}) to {output_dir} in {wall:.2f}s wall; "
+          f"largest view {max(count for count, _, _ in futures.values())} nodes; start at "
+          f"{os.path.join(output_dir, 'overview.' + link_format)}")
+    return results
 
 if __name__ == '__main__':
-    check_graphviz_executable()
-    create_import_diagram('png', '2025-03-21-CGPT-4o-R17-PythonImportsGraphviz_Spaced')
-    create_import_diagram('pdf', '2025-03-21-CGPT-4o-R17-PythonImportsGraphviz_Spaced')
+    import argparse
+    parser = argparse.ArgumentParser(description="Draw the imports found by the package extractor with Graphviz.")
+    parser.add_argument("source", help="summary_all_packages.csv, per_file_imports.jsonl or import_graph.json "
+                                       "written by the extractor")
+    parser.add_argument("-o", "--output", default=THEMES[DEFAULT_THEME]["filename"],
+                        help="Output file name without extension")
+    parser.add_argument("-f", "--format", action="append", dest="formats", metavar="FORMAT",
+                        help="Output format, e.g. png, pdf or svg (repeatable; default: png and pdf). "
+                             "All formats are rendered from one layout")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES,
+                        help="Merge files into directories until the diagram has at most this many nodes")
+    parser.add_argument("--max-edges", type=int, default=DEFAULT_MAX_EDGES,
+                        help="Merge files into directories until the diagram has at most this many edges")
+    parser.add_argument("--max-packages", type=int, default=DEFAULT_MAX_PACKAGES,
+                        help="Draw only this many of the most imported packages; merge the rest per type")
+    parser.add_argument("--transitive-reduction", action="store_true",
+                        help="Drop edges implied by longer import paths (edges inside import cycles are kept)")
+    parser.add_argument("--label-max", type=int, default=LABEL_MAX_CHARS,
+                        help="Truncate import-statement labels to this many characters (0 = no limit)")
+    parser.add_argument("--clusters", action="store_true",
+                        help="Draw files and directories inside nested clusters per directory (Graphviz only)")
+    parser.add_argument("--levels", type=int, metavar="N",
+                        help="Write a level-of-detail set to --output-dir instead of one diagram: an overview of "
+                             "the top-level directories and N-1 levels of linked drill-downs (default format: svg)")
+    parser.add_argument("--theme", action="append", dest="themes", choices=THEMES,
+                        help=f"Theme to render (repeatable; default: {DEFAULT_THEME}). More than one theme, or "
+                             f"--matrix, renders the variants concurrently under their own file names")
+    parser.add_argument("--matrix", action="store_true", help="Render every theme in every format")
+    parser.add_argument("--themes-json", metavar="PATH",
+                        help="Render the themes defined in a JSON file shaped like THEMES instead of the built-in ones")
+    parser.add_argument("--output-dir", default=".", help="Directory for the --matrix and --levels outputs")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Concurrent render jobs for --matrix and --levels (default: one per CPU core)")
+    parser.add_argument("--render-cache", metavar="DIR", default=None,
+                        help=f"Directory of cached renders (default: {RenderCache.DEFAULT_DIR})")
+    parser.add_argument("--no-render-cache", action="store_true", help="Always run Graphviz")
+    parser.add_argument("--engine", choices=("auto", "dot", "neato", "sfdp"), default="auto",
+                        help="Layout engine (default: chosen by graph size)")
+    parser.add_argument("--renderer", choices=("auto", "graphviz", "builtin"), default="auto",
+                        help="Graphviz, or the built-in layered renderer (svg and txt only, no external binary). "
+                             "auto uses the built-in one when Graphviz is missing or when it can write every "
+                             f"requested format for a graph of at most {BUILTIN_MAX_NODES} nodes")
+    parser.add_argument("--ascii", action="store_true",
+                        help="Print the diagram as an ASCII tree instead of writing files")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_RENDER_TIMEOUT,
+                        help="Seconds per layout attempt before falling back to a cheaper engine or a reduced graph")
+    args = parser.parse_args()
+
+    simplify_options = {"transitive_reduction": args.transitive_reduction, "label_max": args.label_max}
+    if args.ascii:
+        data = load_import_data(args.source)
+        print(render_ascii(*prepare_graph(data, args.max_nodes, args.max_edges, args.max_packages,
+                                          simplify_options)), end='')
+        sys.exit(0)
+    matrix = not args.levels and (args.matrix or args.themes_json or (args.themes and len(args.themes) > 1))
+    if matrix or args.renderer == "graphviz":
+        if Digraph is None:
+            print("[✘] The graphviz Python package is not installed: pip install graphviz")
+            sys.exit(1)
+        check_graphviz_executable()
+    formats = args.formats or (['svg'] if args.levels else ['png', 'pdf'])
+    cache = None if args.no_render_cache else RenderCache(args.render_cache)
+    if args.levels:
+        render_levels(args.source, formats, args.output_dir, args.levels, args.jobs, args.max_nodes, args.max_edges,
+                      args.max_packages, args.themes[0] if args.themes else DEFAULT_THEME, cache, args.timeout,
+                      args.engine, args.renderer, simplify_options)
+    elif matrix:
+        if args.themes_json:
+            with open(args.themes_json, encoding='utf-8') as f:
+                themes = json.load(f)
+        else:
+            themes = {name: THEMES[name] for name in args.themes or THEMES}
+        render_matrix(args.source, themes, formats, args.output_dir, args.jobs,
+                      args.max_nodes, args.max_edges, args.max_packages, cache, args.timeout, args.engine,
+                      simplify_options, args.clusters)
+    else:
+        theme = args.themes[0] if args.themes else DEFAULT_THEME
+        create_import_diagram(formats, args.output, args.source, args.max_nodes, args.max_edges, args.max_packages,
+                              theme, cache, args.timeout, args.engine, args.renderer, simplify_options,
+                              args.clusters)
+    if cache is not None and cache.hits + cache.misses:
+        print(f"[INFO] Render cache {cache.directory}: {cache.hits} hits, {cache.misses} misses")